@@ -1,9 +1,11 @@
 from virl2_client import ClientLibrary
 from ipaddress import ip_interface
+import asyncio
 import os
-import subprocess
 import time
 from netmiko import ConnectHandler
+from rich.live import Live
+from rich.table import Table
 
 client = ClientLibrary(
     os.environ["VIRL_HOST"],
@@ -46,16 +48,6 @@ lab.create_node(label="mgmt", node_definition="external_connector", x=100, y=100
 ##########################################################################################################################
 
 
-# create interfaces
-for n in lab.nodes():
-    if n.label == "mgmt":
-        continue
-    for i in range(16):
-        n.create_interface(i)
-
-##########################################################################################################################
-
-
 # define nodes
 
 ##site 1
@@ -120,9 +112,6 @@ mgmt.x, mgmt.y = 500, -300
 
 
 # connect nodes
-for link in lab.links():
-    link.remove()
-
 pairs_to_connect = [
     # Site 1
     ("site-1-r1", "site-1-r2"),
@@ -167,18 +156,61 @@ pairs_to_connect = [
 ## map labels to node objects
 node_map = {n.label: n for n in lab.nodes()}
 
+##########################################################################################################################
+
+
+# create interfaces
+# each node gets one interface per link, but never fewer than its node definition needs to start
+base = client._session.base_url
+min_counts = {
+    nd["id"]: nd["device"]["interfaces"].get("min_count") or 0
+    for nd in client._session.get(f"{base}/simplified_node_definitions").json()
+}
+links_per_node = {label: 0 for label in node_map}
 for a, b in pairs_to_connect:
-    n1 = node_map[a]
-    n2 = node_map[b]
+    links_per_node[a] += 1
+    links_per_node[b] += 1
+
+
+def create_interfaces(node):
+    needed = max(links_per_node[node.label], min_counts.get(node.node_definition, 0))
+    have = len(node.physical_interfaces())
+    # asking for the last slot creates every slot up to it in one call
+    if needed > have:
+        node.create_interface(needed - 1)
 
-    ### check if already connected
-    already_connected = any(
-        set(link.nodes) == {n1, n2}
-        for link in lab.links()
-    )
 
-    if not already_connected:
-        lab.connect_two_nodes(n1, n2)
+# the Lab object is not thread-safe, so its create_* calls are made one at a time
+for node in node_map.values():
+    create_interfaces(node)
+
+### one snapshot of the existing links, keyed by the (unordered) pair of nodes they join
+links = lab.links()
+existing = {frozenset((link.node_a.label, link.node_b.label)) for link in links}
+used_ifaces = {iface.id for link in links for iface in (link.interface_a, link.interface_b)}
+missing = {frozenset(pair) for pair in pairs_to_connect} - existing
+
+### pick interfaces up front (in pairs_to_connect order, so numbering is stable), then create the links in one pass
+free_ifaces = {
+    label: [i for i in sorted(n.physical_interfaces(), key=lambda i: i.slot) if i.id not in used_ifaces]
+    for label, n in node_map.items()
+}
+
+def next_free_interface(label):
+    if not free_ifaces[label]:
+        free_ifaces[label].append(node_map[label].create_interface())
+    return free_ifaces[label].pop(0)
+
+planned = []
+for a, b in pairs_to_connect:
+    pair = frozenset((a, b))
+    if pair in missing:
+        missing.discard(pair)
+        planned.append((next_free_interface(a), next_free_interface(b)))
+
+for ends in planned:
+    lab.create_link(*ends)
+print(f"created {len(planned)} links")
 
 ##########################################################################################################################
 
@@ -216,7 +248,6 @@ def ip_pool(network="192.168.100.0", start=1):
         start += 1
 
 pool = ip_pool()
-base = client._session.base_url
 ext_link = mgmt_sw.get_link_to(mgmt)
 ext_if = ext_link.interface_a if ext_link.interface_a.node == mgmt_sw else ext_link.interface_b
 user_ssh_config = [
@@ -267,6 +298,7 @@ client._session.patch(
 print("mgmt-sw configured")
 
 # all routers: assign IP on interface that faces mgmt-sw
+mgmt_ips = {"mgmt-sw": "192.168.100.254"}
 for node in lab.nodes():
     if node.node_definition == "external_connector" or node.label == "mgmt-sw":
         continue
@@ -295,70 +327,122 @@ for node in lab.nodes():
         f"{base}/labs/{lab.id}/nodes/{node.id}",
         json={"configuration": cfg},
     ).raise_for_status()
+    mgmt_ips[node.label] = ip
     print(f"{node.label} configured {ip}/{plen} on {iface.label}")
 
 ##########################################################################################################################
 
-def wait_for_reachability(ip, interval=180):
-    print(f"Waiting for {ip} ...")
-    while True:
-        result = subprocess.run(
-            ["ping", "-c", "1", "-W", "1", ip],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-        if result.returncode == 0:
-            print(f"{ip} is reachable")
-            return
-        time.sleep(interval)
-
-# 1. Start external connector
-ext = lab.get_node_by_label("mgmt")
-print("Starting external connector ...")
-ext.start()
-
-# 2. Start mgmt switch
-print("Starting mgmt-sw ...")
-mgmt_sw.start()
-wait_for_reachability("192.168.100.254")
-
-# 2a. Bounce Vlan Int
-mgmt_sw_miko = {
-    "device_type": "cisco_ios",
-    "ip": "10.0.0.100",
-    "username": "john",
-    "password": "john1214"
-}
+# Boot everything at once; a node is only probed once the nodes it is reached through are up,
+# so the lab is reachable in roughly the time of the slowest single boot.
 
-config_commands = [
-    "interface vlan 100",
-    "shutdown",
-    "no shutdown"
-    ]
+BOOT_DEADLINE = 900  # seconds each node may take to become ready after it is started
+PROBE_INTERVAL = 0.5  # seconds between readiness probes
 
-mgmt_sw_miko_connection = ConnectHandler(**mgmt_sw_miko)
-mgmt_sw_miko_connection.send_config_set(config_commands)
-mgmt_sw_miko_connection.save_config()
-mgmt_sw_miko_connection.disconnect()
+# node label -> labels of the nodes that must be ready before it can be reached
+boot_deps = {"mgmt": [], "mgmt-sw": ["mgmt"], **{name: ["mgmt-sw"] for name in router_nodes}}
 
-# 3. Start routers one at a time, wait for their mgmt IP
-for node in lab.nodes():
-    if node.node_definition == "external_connector" or node.label == "mgmt-sw":
-        continue
 
-    print(f"Starting {node.label} ...")
-    node.start()
+class BootStatus:
+    def __init__(self, label):
+        self.label = label
+        self.state = "pending"
+        self.started = None
+        self.finished = None
+
+    def elapsed(self):
+        if self.started is None:
+            return ""
+        return f"{(self.finished or time.monotonic()) - self.started:.0f}s"
 
-    # get the mgmt IP you assigned earlier by parsing its configuration
-    ip = None
-    for line in node.configuration.splitlines():
-        if line.strip().startswith("ip address") and "192.168.100." in line:
-            ip = line.split()[2]
-            break
-    if not ip:
-        raise RuntimeError(f"No mgmt IP found in {node.label} configuration")
 
-    wait_for_reachability(ip)
+async def ping(ip):
+    proc = await asyncio.create_subprocess_exec(
+        "ping", "-c", "1", "-W", "1", ip,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    return await proc.wait() == 0
+
+
+def bounce_mgmt_vlan():
+    mgmt_sw_miko = {
+        "device_type": "cisco_ios",
+        "ip": "10.0.0.100",
+        "username": "john",
+        "password": "john1214"
+    }
+    config_commands = [
+        "interface vlan 100",
+        "shutdown",
+        "no shutdown"
+        ]
+    mgmt_sw_miko_connection = ConnectHandler(**mgmt_sw_miko)
+    mgmt_sw_miko_connection.send_config_set(config_commands)
+    mgmt_sw_miko_connection.save_config()
+    mgmt_sw_miko_connection.disconnect()
+
+
+async def boot_node(label, ready, failed, status):
+    node = node_map[label]
+    status.state = "starting"
+    status.started = time.monotonic()
+    deadline = status.started + BOOT_DEADLINE
+    try:
+        await asyncio.to_thread(node.start, wait=False)
+
+        status.state = "waiting for " + ", ".join(boot_deps[label]) if boot_deps[label] else "booting"
+        for dep in boot_deps[label]:
+            await asyncio.wait_for(ready[dep].wait(), max(0, deadline - time.monotonic()))
+            if dep in failed:
+                raise RuntimeError(f"{dep} failed")
+
+        # nodes with a mgmt IP are ready once they answer; the rest once CML says they have booted
+        ip = mgmt_ips.get(label)
+        status.state = f"probing {ip}" if ip else "booting"
+        while not (await ping(ip) if ip else await asyncio.to_thread(node.is_booted)):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"not ready after {BOOT_DEADLINE}s")
+            await asyncio.sleep(PROBE_INTERVAL)
+
+        if label == "mgmt-sw":
+            status.state = "bouncing Vlan100"
+            await asyncio.to_thread(bounce_mgmt_vlan)
+        status.state = "ready"
+    except Exception as e:
+        failed.add(label)
+        status.state = f"failed: {str(e) or type(e).__name__}"
+    finally:
+        status.finished = time.monotonic()
+        ready[label].set()
+
+
+def boot_table(statuses):
+    table = Table(title=f"Booting {LAB_TITLE}")
+    table.add_column("Node")
+    table.add_column("Mgmt IP")
+    table.add_column("State")
+    table.add_column("Elapsed", justify="right")
+    for status in statuses.values():
+        table.add_row(status.label, mgmt_ips.get(status.label, ""), status.state, status.elapsed())
+    return table
+
+
+async def boot_lab():
+    ready = {label: asyncio.Event() for label in boot_deps}
+    failed = set()
+    statuses = {label: BootStatus(label) for label in boot_deps}
+    with Live(boot_table(statuses), refresh_per_second=4) as live:
+        tasks = [asyncio.create_task(boot_node(label, ready, failed, statuses[label])) for label in boot_deps]
+        while not all(task.done() for task in tasks):
+            live.update(boot_table(statuses))
+            await asyncio.sleep(0.25)
+        live.update(boot_table(statuses))
+    return failed
+
+
+failed = asyncio.run(boot_lab())
+if failed:
+    raise RuntimeError(f"Nodes not ready: {', '.join(sorted(failed))}")
 
 print("All nodes started and reachable.")
 
@@ -41,8 +41,32 @@ for node in router_nodes:
 
 
 
-# Start Nodes Carefully 
-for node in lab.nodes():
-    print(f"starting {node.label}...")
-    node.start()
-    time.sleep(120)
\ No newline at end of file
+# Start Nodes
+# Nodes are started in waves of WAVE_SIZE (0 starts them all at once); each wave waits until
+# CML reports every node in it as BOOTED, so bring-up takes as long as the nodes actually need.
+WAVE_SIZE = 0
+BOOT_TIMEOUT = 600  # seconds a wave may take to boot
+POLL_INTERVAL = 2  # seconds between state checks
+
+nodes = lab.nodes()
+wave_size = WAVE_SIZE or len(nodes)
+for i in range(0, len(nodes), wave_size):
+    wave = nodes[i : i + wave_size]
+    for node in wave:
+        print(f"starting {node.label}...")
+        node.start(wait=False)
+
+    deadline = time.monotonic() + BOOT_TIMEOUT
+    pending = list(wave)
+    while True:
+        # is_booted() refreshes the state of the whole lab at most once per poll
+        for node in [node for node in pending if node.is_booted()]:
+            print(f"{node.label} booted")
+            pending.remove(node)
+        if not pending:
+            break
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Not booted after {BOOT_TIMEOUT}s: {', '.join(node.label for node in pending)}")
+        time.sleep(POLL_INTERVAL)
+
+print("All nodes booted.")
\ No newline at end of file
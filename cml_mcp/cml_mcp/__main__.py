@@ -23,12 +23,35 @@
 # SUCH DAMAGE.
 
 import sys
-from cml_mcp.server import server_mcp
+
+import uvicorn
+
+from cml_mcp.settings import settings
 
 sys.setrecursionlimit(10000)  
 
 def main():
-    server_mcp.run(transport="http", host="127.0.0.1", port=8000)
+    if settings.server_workers > 1:
+        # Each worker imports the server and builds its own app; uvicorn shares the listening
+        # socket between them and, on shutdown, lets in-flight requests finish before exiting.
+        uvicorn.run(
+            "cml_mcp.server:create_app",
+            factory=True,
+            host=settings.server_host,
+            port=settings.server_port,
+            workers=settings.server_workers,
+            timeout_graceful_shutdown=settings.server_shutdown_timeout,
+        )
+        return
+
+    from cml_mcp.server import server_mcp
+
+    server_mcp.run(
+        transport="http",
+        host=settings.server_host,
+        port=settings.server_port,
+        uvicorn_config={"timeout_graceful_shutdown": settings.server_shutdown_timeout},
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,288 @@
+# Copyright (c) 2025  Cisco Systems, Inc.
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+
+import asyncio
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+logger = logging.getLogger("cml-mcp")
+
+# Longest time between sweeps for idle sessions
+EVICT_INTERVAL_MAX = 60.0  # seconds
+
+# Per-worker state for CLI worker threads
+_worker = threading.local()
+
+
+def scratch_dir() -> str:
+    """
+    Return the calling CLI worker's scratch directory (or the system temp directory outside a worker).
+    """
+    return getattr(_worker, "scratch_dir", tempfile.gettempdir())
+
+
+class _LabTestbed(object):
+    def __init__(self, testbed: Any, fingerprint: str):
+        self.testbed = testbed
+        self.fingerprint = fingerprint
+
+
+class _Session(object):
+    def __init__(self, device: Any):
+        self.device = device
+        self.last_used = time.monotonic()
+        # A console connection can only run one command at a time
+        self.lock = threading.Lock()
+
+
+class PyatsSessionPool(object):
+    """
+    A pool of warm pyATS/unicon console connections, keyed by (lab ID, node label).
+
+    Each lab's pyATS testbed is loaded once and reused until the lab's topology
+    fingerprint changes.  Device connections are reused across calls, reconnected if
+    they have dropped, and disconnected once they have been idle for longer than
+    idle_ttl seconds (see CliWorkerPool.evict_idle_sessions()).
+
+    The pool is thread-safe; all of its methods block and must not be called from
+    the event loop thread.
+    """
+
+    def __init__(self, username: str, password: str, idle_ttl: float):
+        self.username = username
+        self.password = password
+        self.idle_ttl = idle_ttl
+        # Guards the dictionaries below; never held while talking to the network
+        self._lock = threading.Lock()
+        # Serialize testbed (re)loads per lab, so concurrent calls to one lab load it once
+        self._lab_locks: dict[str, threading.Lock] = {}
+        self._labs: dict[str, _LabTestbed] = {}
+        self._sessions: dict[tuple[str, str], _Session] = {}
+
+    def _load_testbed(self, testbed_yaml: str) -> Any:
+        try:
+            from pyats.topology import loader
+        except ImportError:
+            raise ImportError(
+                "PyATS and Genie are required to send commands to running devices.  See the documentation on how to install them."
+            )
+        testbed = loader.load(io.StringIO(testbed_yaml))
+        # Console access goes through the CML terminal server, which uses the CML credentials
+        testbed.devices.terminal_server.credentials.default.username = self.username
+        testbed.devices.terminal_server.credentials.default.password = self.password
+        return testbed
+
+    def _pop_lab(self, lid: str) -> list[_Session]:
+        # Caller must hold self._lock; the returned sessions still need disconnecting
+        self._labs.pop(lid, None)
+        return [self._sessions.pop(key) for key in [key for key in self._sessions if key[0] == lid]]
+
+    @staticmethod
+    def _disconnect(session: _Session) -> None:
+        # Wait for any command in flight on this session before closing it
+        with session.lock:
+            try:
+                if session.device.is_connected():
+                    session.device.disconnect()
+            except Exception as e:
+                logger.debug(f"Error disconnecting from {session.device.name}: {str(e)}")
+
+    def evict_idle(self) -> None:
+        """
+        Disconnect sessions that have not been used for idle_ttl seconds.
+        """
+        cutoff = time.monotonic() - self.idle_ttl
+        with self._lock:
+            idle = [key for key, session in self._sessions.items() if session.last_used < cutoff and not session.lock.locked()]
+            evicted = [self._sessions.pop(key) for key in idle]
+        for session in evicted:
+            self._disconnect(session)
+        if evicted:
+            logger.debug(f"Evicted {len(evicted)} idle CLI session(s)")
+
+    def _checkout(self, lid: str, label: str, fingerprint: str, fetch_testbed: Callable[[], str]) -> _Session:
+        with self._lock:
+            lab_lock = self._lab_locks.setdefault(lid, threading.Lock())
+        with lab_lock:
+            with self._lock:
+                lab = self._labs.get(lid)
+            if lab is None or lab.fingerprint != fingerprint or label not in lab.testbed.devices:
+                # New lab, or its topology changed since the testbed was loaded
+                lab = _LabTestbed(self._load_testbed(fetch_testbed()), fingerprint)
+                with self._lock:
+                    stale = self._pop_lab(lid)
+                    self._labs[lid] = lab
+                for session in stale:
+                    self._disconnect(session)
+            with self._lock:
+                session = self._sessions.get((lid, label))
+                if session is None:
+                    try:
+                        device = lab.testbed.devices[label]
+                    except KeyError:
+                        raise ValueError(f"Node '{label}' was not found in the pyATS testbed for lab {lid}.")
+                    session = self._sessions[(lid, label)] = _Session(device)
+                return session
+
+    def _lock_session(self, lid: str, label: str, fingerprint: str, fetch_testbed: Callable[[], str]) -> _Session:
+        """
+        Check out a node's session and acquire its lock.
+
+        The session may be evicted (or dropped by a testbed reload) between checkout and
+        taking its lock, so it is only returned once it is still the pooled session for
+        the node; otherwise it is checked out again.  The caller must release the lock.
+        """
+        while True:
+            session = self._checkout(lid, label, fingerprint, fetch_testbed)
+            session.lock.acquire()
+            with self._lock:
+                if self._sessions.get((lid, label)) is session:
+                    return session
+            session.lock.release()
+
+    def run(
+        self,
+        lid: str,
+        label: str,
+        commands: str,
+        config_command: bool,
+        fingerprint: str,
+        fetch_testbed: Callable[[], str],
+    ) -> str:
+        """
+        Run exec or configuration commands on a node, reusing a pooled console connection.
+
+        Args:
+            lid (str): The lab ID.
+            label (str): The node label.
+            commands (str): The commands to send, separated by newlines.
+            config_command (bool): Whether the commands are configuration commands.
+            fingerprint (str): Identifies the lab's current topology; a change forces the testbed to be reloaded.
+            fetch_testbed (Callable[[], str]): Returns the lab's pyATS testbed YAML.
+
+        Returns:
+            str: The command output.
+        """
+        self.evict_idle()
+        session = self._lock_session(lid, label, fingerprint, fetch_testbed)
+        try:
+            device = session.device
+            if not device.is_connected():
+                logger.debug(f"Opening console connection to {label} in lab {lid}")
+                device.connect(
+                    log_stdout=False, learn_hostname=True, logfile=os.path.join(scratch_dir(), f"{lid}-{label}.log")
+                )
+            try:
+                if config_command:
+                    return device.configure(commands, log_stdout=False)
+                return device.execute(commands, log_stdout=False)
+            finally:
+                session.last_used = time.monotonic()
+        finally:
+            session.lock.release()
+
+    def close(self) -> None:
+        """
+        Disconnect every pooled session.
+        """
+        with self._lock:
+            sessions = [session for lid in list(self._labs) for session in self._pop_lab(lid)]
+        for session in sessions:
+            self._disconnect(session)
+
+
+class CliWorkerPool(object):
+    """
+    Runs blocking pyATS work on dedicated worker threads so the event loop stays responsive.
+
+    Commands for different nodes run in parallel (commands for the same node are
+    serialized by the session pool).  At most `workers` commands run at once and at
+    most `queue_size` more may wait; beyond that, new commands are rejected.
+    """
+
+    def __init__(self, sessions: PyatsSessionPool, workers: int, queue_size: int):
+        self.sessions = sessions
+        self.limit = workers + queue_size
+        self.pending = 0
+        self._scratch_dirs: list[tempfile.TemporaryDirectory] = []
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cli-worker", initializer=self._init_worker)
+
+    def _init_worker(self) -> None:
+        # pyATS/unicon need somewhere writable for their logs; give each worker its own
+        # directory rather than changing the working directory of the whole process.
+        scratch = tempfile.TemporaryDirectory(prefix="cml-mcp-cli-", ignore_cleanup_errors=True)
+        self._scratch_dirs.append(scratch)
+        _worker.scratch_dir = scratch.name
+
+    async def run(
+        self,
+        lid: str,
+        label: str,
+        commands: str,
+        config_command: bool,
+        fingerprint: str,
+        fetch_testbed: Callable[[], str],
+    ) -> str:
+        """
+        Run commands on a node from a worker thread; see PyatsSessionPool.run().
+
+        Raises:
+            RuntimeError: If the worker queue is full.
+        """
+        if self.pending >= self.limit:
+            raise RuntimeError(f"Too many CLI commands in progress ({self.pending}); try again shortly.")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, self.sessions.run, lid, label, commands, config_command, fingerprint, fetch_testbed
+            )
+        finally:
+            self.pending -= 1
+
+    async def evict_idle_sessions(self) -> None:
+        """
+        Disconnect idle sessions periodically, so that connections (and device vty lines)
+        are released even when no commands arrive.  Runs until cancelled.
+        """
+        interval = max(1.0, min(self.sessions.idle_ttl / 2, EVICT_INTERVAL_MAX))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.sessions.evict_idle)
+            except Exception as e:
+                logger.error(f"Error evicting idle CLI sessions: {str(e)}", exc_info=True)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.sessions.close()
+        for scratch in self._scratch_dirs:
+            scratch.cleanup()
+        self._scratch_dirs.clear()
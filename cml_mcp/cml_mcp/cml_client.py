@@ -22,14 +22,32 @@
 # OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
 # SUCH DAMAGE.
 
+import asyncio
+import base64
+import copy
+import json
 import logging
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import Any
 import os
 import httpx
-import virl2_client
 import ssl
 
 API_TIMEOUT = 10  # seconds
+POOL_WAIT_WARN = 0.1  # seconds; requests that wait longer than this for a connection are logged
+TOKEN_LIFETIME = 8 * 60 * 60  # seconds, CML's default; used when the token carries no expiry
+TOKEN_EXPIRY_MARGIN = 60  # seconds before expiry at which a token is no longer trusted
+# Methods that may safely be sent more than once
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Responses that mean the controller is busy or briefly unavailable
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Failures that happen before the request reaches the controller, so any method may be retried
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+RETRY_AFTER_MAX = 60.0  # seconds; longer Retry-After values are capped
+TOKEN_STORE_KEY = "cml-token"
 ssl_context = ssl.create_default_context()
 
 # Set up logging
@@ -37,21 +55,254 @@ logging.basicConfig(level=logging.DEBUG, format="%(asctime)s %(levelname)s %(thr
 logger = logging.getLogger(__name__)
 
 
+def token_expiry(token: str, issued: float) -> float:
+    """
+    Work out when a CML API token expires.
+
+    CML tokens are JWTs, so the expiry is read from the (unverified) "exp" claim.
+    If the token cannot be decoded, the default CML token lifetime is assumed.
+
+    Args:
+        token (str): The bearer token returned by /authenticate.
+        issued (float): The time the token was issued, as returned by time.time().
+
+    Returns:
+        float: The expiry time, comparable with time.time().
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        if exp:
+            return float(exp)
+    except (IndexError, ValueError, AttributeError):
+        pass
+    return issued + TOKEN_LIFETIME
+
+
+def retry_after(resp: httpx.Response) -> float | None:
+    """
+    Return the delay requested by a response's Retry-After header (in seconds or as an HTTP date), if any.
+    """
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return min(max(0.0, float(value)), RETRY_AFTER_MAX)
+    except ValueError:
+        pass
+    try:
+        return min(max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()), RETRY_AFTER_MAX)
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a request while the controller is considered down.
+    """
+
+
+class RetryPolicy(object):
+    """
+    How often, and how patiently, to retry requests that failed for transient reasons.
+
+    Delays use "full jitter" exponential backoff: a random delay between zero and
+    base_delay * 2**attempt, capped at max_delay, so that many clients retrying at once
+    spread out instead of hitting the controller in lock step.
+    """
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 10.0):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+class CircuitBreaker(object):
+    """
+    Fails requests fast while a controller is down.
+
+    After `threshold` consecutive failures (connection errors or 5xx responses) the
+    circuit opens and requests are rejected without being sent.  Once `reset_timeout`
+    seconds have passed, the circuit is half-open: one request is let through as a
+    probe, and if it succeeds the circuit closes, otherwise it stays open for another
+    reset_timeout.
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probing = False
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.probing else "open"
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at >= self.reset_timeout:
+            # Let this request through as a probe, and hold everyone else off for another period
+            self.opened_at = now
+            self.probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.probing = False
+        if self.opened_at is not None:
+            logger.info("CML controller is reachable again; closing the circuit breaker")
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.probing = False
+        if self.opened_at is not None:
+            self.opened_at = time.monotonic()
+        elif self.failures >= self.threshold:
+            logger.warning(f"{self.failures} consecutive CML API failures; failing requests fast for {self.reset_timeout:.0f}s")
+            self.opened_at = time.monotonic()
+            self.trips += 1
+
+
+# One breaker per controller, shared by every client talking to it
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def circuit_breaker(host: str, threshold: int, reset_timeout: float) -> CircuitBreaker:
+    """
+    Return the circuit breaker for a controller, creating it on first use.
+    """
+    return _breakers.setdefault(host, CircuitBreaker(threshold, reset_timeout))
+
+
+class _Flight(object):
+    """
+    A GET request in progress, shared by every caller that asked for the same thing.
+    """
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class TransportStats(object):
+    """
+    Counters describing how well the connection pool is serving requests.
+
+    A request either reuses a pooled connection or opens a new one.  Pool wait is the
+    time between handing a request to the transport and it getting a connection, and
+    is the number to watch when sizing the pool.
+    """
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self.pool_wait_total = 0.0
+        self.pool_wait_max = 0.0
+        self.retries = 0
+        self.retries_exhausted = 0
+        self.coalesced = 0
+
+    @property
+    def reused_connections(self) -> int:
+        return self.requests - self.new_connections
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+            "tls_handshakes": self.tls_handshakes,
+            "pool_wait_avg": self.pool_wait_total / self.requests if self.requests else 0.0,
+            "pool_wait_max": self.pool_wait_max,
+            "retries": self.retries,
+            "retries_exhausted": self.retries_exhausted,
+            "coalesced_gets": self.coalesced,
+        }
+
+
 class CMLClient(object):
     """
     Async client for interacting with the CML API.
     Handles authentication and provides methods to fetch system and lab information.
+
+    The API token is cached along with its expiry, so requests made while the token
+    is known to be good go straight to the controller.  A request that is rejected
+    with a 401 forces a single re-login and is then retried once.
+
+    Requests that fail for transient reasons (connection errors, 429 and 5xx
+    responses) are retried according to the retry policy, but only if they are safe
+    to repeat: idempotent methods, requests flagged as idempotent, and requests that
+    never reached the controller.  A per-controller circuit breaker stops sending
+    requests while the controller is down.
+
+    Concurrent GETs for the same endpoint and parameters share a single request
+    ("single flight"); each caller gets its own copy of the decoded result.
+
+    If a token store (a diskcache.Cache or anything with the same get/set/delete
+    interface) is given, the token is shared through it, so that several server
+    processes use one CML session rather than logging in separately.
     """
 
-    def __init__(self, host: str, username: str, password: str):
+    def __init__(
+        self,
+        host: str,
+        username: str,
+        password: str,
+        *,
+        limits: httpx.Limits | None = None,
+        timeout: httpx.Timeout | None = None,
+        http2: bool = False,
+        retry: RetryPolicy | None = None,
+        breaker_threshold: int = 5,
+        breaker_reset: float = 30.0,
+        token_store: Any | None = None,
+    ):
         self.base_url = host.rstrip("/")
         self.api_base = f"{self.base_url}/api/v0"
-        self.client = httpx.AsyncClient(verify=ssl_context, timeout=API_TIMEOUT)
-        self.vclient = virl2_client.ClientLibrary(host, username, password, ssl_verify=ssl_context)
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP/2 requested but the h2 package is not installed; falling back to HTTP/1.1")
+                http2 = False
+        self.limits = limits or httpx.Limits()
+        self.client = httpx.AsyncClient(
+            verify=ssl_context,
+            timeout=timeout or httpx.Timeout(API_TIMEOUT),
+            limits=self.limits,
+            http2=http2,
+        )
+        self.http2 = http2
+        self.stats = TransportStats()
+        self.retry = retry or RetryPolicy()
+        self.breaker = circuit_breaker(self.base_url, breaker_threshold, breaker_reset)
         self.token = None
+        self.token_issued: float | None = None
+        self.token_expires: float | None = None
         self.admin = None
         self.username = username
         self.password = password
+        # Ensures concurrent callers share one login rather than each starting their own
+        self._login_lock = asyncio.Lock()
+        self.token_store = token_store
+        self._token_key = f"{TOKEN_STORE_KEY}:{self.base_url}:{username}"
+        # GETs in progress, keyed by endpoint and parameters
+        self._flights: dict[tuple, _Flight] = {}
 
     async def login(self) -> None:
             url = f"{self.base_url}/api/v0/authenticate"
@@ -64,38 +315,199 @@ class CMLClient(object):
             if isinstance(token, dict):
                 token = token.get("token") or next(iter(token.values()))
             self.token = token.strip('"')
+            self.token_issued = time.time()
+            self.token_expires = token_expiry(self.token, self.token_issued)
             self.client.headers.update({"Authorization": f"Bearer {self.token}"})
+            if self.token_store is not None:
+                self.token_store.set(
+                    self._token_key, (self.token, self.token_issued, self.token_expires), expire=self.token_expires - time.time()
+                )
             logger.info("Authenticated with CML API")
 
+    def _adopt_shared_token(self) -> bool:
+        """
+        Use a still-valid token that another process sharing the token store obtained, if there is one.
+        """
+        if self.token_store is None:
+            return False
+        shared = self.token_store.get(self._token_key)
+        if not shared or time.time() >= shared[2] - TOKEN_EXPIRY_MARGIN:
+            return False
+        self.token, self.token_issued, self.token_expires = shared
+        self.client.headers.update({"Authorization": f"Bearer {self.token}"})
+        logger.debug("Using the CML API token shared by another worker")
+        return True
+
+    def token_valid(self) -> bool:
+        """
+        Check whether the cached token is believed to still be valid.
+        """
+        return (
+            self.token is not None
+            and self.token_expires is not None
+            and time.time() < self.token_expires - TOKEN_EXPIRY_MARGIN
+        )
+
+    def invalidate_token(self, token: str | None = None) -> None:
+        """
+        Drop the cached token.
+
+        If token is given, the cached token is only dropped if it is still that token,
+        so a stale 401 cannot throw away a token that another caller just obtained.
+        """
+        if token is not None and token != self.token:
+            return
+        if self.token_store is not None and self.token is not None:
+            shared = self.token_store.get(self._token_key)
+            if shared and shared[0] == self.token:
+                self.token_store.delete(self._token_key)
+        self.token = None
+        self.token_issued = None
+        self.token_expires = None
+        self.client.headers.pop("Authorization", None)
 
     async def check_authentication(self) -> None:
-        # If we don't have a token yet, do a clean login
-        if not self.token:
-            self.client.headers.pop("Authorization", None)
-            await self.login()
+        # Fast path: no round trip while the token is known-good
+        if self.token_valid():
             return
 
-        url = f"{self.base_url}/api/v0/authok"
-        try:
-            resp = await self.client.get(url, headers={"Authorization": f"Bearer {self.token}"})
-            resp.raise_for_status()
-            return  # Token still valid
-        except httpx.HTTPStatusError as e:
-            # Treat 400 and 401 both as "bad token"
-            if e.response.status_code in (400, 401):
-                logger.debug("Token invalid or expired, forcing reauthentication...")
-                self.token = None
-                self.client.headers.pop("Authorization", None)
-                await self.login()
-            else:
-                logger.error(f"Auth check failed with {e.response.status_code}: {e}", exc_info=True)
-                raise
-        except httpx.RequestError as e:
-            logger.error(f"Auth check TLS/request error: {e}", exc_info=True)
-            raise
+        async with self._login_lock:
+            # Another caller may have logged in while we were waiting
+            if self.token_valid():
+                return
+            self.invalidate_token()
+            if self._adopt_shared_token():
+                return
+            logger.debug("No valid token, authenticating...")
+            await self.login()
+
+    def _trace(self) -> Any:
+        """
+        Build an httpcore trace hook that records connection reuse and pool wait for one request.
+        """
+        started = time.perf_counter()
+        seen_connection = False
+        self.stats.requests += 1
 
+        async def trace(event_name: str, info: dict) -> None:
+            nonlocal seen_connection
+            if event_name == "connection.start_tls.started":
+                self.stats.tls_handshakes += 1
+            # The first of these events marks the point at which the request got a connection
+            if seen_connection or not (
+                event_name == "connection.connect_tcp.started" or event_name.endswith("send_request_headers.started")
+            ):
+                return
+            seen_connection = True
+            if event_name == "connection.connect_tcp.started":
+                self.stats.new_connections += 1
+            waited = time.perf_counter() - started
+            self.stats.pool_wait_total += waited
+            self.stats.pool_wait_max = max(self.stats.pool_wait_max, waited)
+            if waited > POOL_WAIT_WARN:
+                logger.debug(f"Request waited {waited:.3f}s for a pooled connection (limits: {self.limits})")
 
+        return trace
 
+    def transport_stats(self) -> dict[str, Any]:
+        """
+        Return connection pool statistics along with the configured pool limits.
+        """
+        return {
+            **self.stats.as_dict(),
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "retry_attempts": self.retry.attempts,
+            "circuit_state": self.breaker.state,
+            "circuit_trips": self.breaker.trips,
+            "circuit_rejected": self.breaker.rejected,
+        }
+
+    def health(self) -> dict[str, Any]:
+        """
+        Summarize the client's view of the controller, without contacting it.
+        """
+        return {
+            "reachable": self.breaker.state == "closed",
+            "circuit_state": self.breaker.state,
+            "authenticated": self.token_valid(),
+            "token_expires_in": max(0.0, self.token_expires - time.time()) if self.token_valid() else None,
+            "pool_warm": self.stats.new_connections > 0,
+            "connections_opened": self.stats.new_connections,
+            "requests": self.stats.requests,
+        }
+
+    async def _send(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        Send one authenticated request.
+
+        If the controller rejects the token (e.g., it was revoked or the controller
+        restarted), log in again and resend the request once.
+        """
+        await self.check_authentication()
+        token = self.token
+        resp = await self.client.request(method, url, extensions={"trace": self._trace()}, **kwargs)
+        if resp.status_code == 401:
+            logger.debug("Token rejected by the controller, forcing reauthentication...")
+            self.invalidate_token(token)
+            await self.check_authentication()
+            resp = await self.client.request(method, url, extensions={"trace": self._trace()}, **kwargs)
+        return resp
+
+    async def _request(self, method: str, endpoint: str, idempotent: bool | None = None, **kwargs: Any) -> httpx.Response:
+        """
+        Send a request to the CML API, retrying transient failures, and raise for HTTP errors.
+
+        Args:
+            method (str): The HTTP method.
+            endpoint (str): The API endpoint, relative to the API base.
+            idempotent (bool | None): Whether the request may be repeated; defaults to whether the method is idempotent.
+
+        A DELETE that finds nothing to delete (404) after a retry is treated as successful,
+        since the attempt that failed may well have done the deletion.
+
+        Raises:
+            CircuitOpenError: If the controller is considered down.
+        """
+        url = f"{self.api_base}{endpoint}"
+        retryable = method in IDEMPOTENT_METHODS if idempotent is None else idempotent
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"The CML controller at {self.base_url} is unavailable; not sending {method} {endpoint}")
+            last_attempt = attempt + 1 >= self.retry.attempts
+            try:
+                resp = await self._send(method, url, **kwargs)
+            except httpx.TransportError as e:
+                self.breaker.record_failure()
+                if last_attempt or not (retryable or isinstance(e, NOT_SENT_ERRORS)):
+                    if attempt:
+                        self.stats.retries_exhausted += 1
+                    raise
+                delay = self.retry.backoff(attempt)
+                reason = type(e).__name__
+            else:
+                if resp.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                if method == "DELETE" and attempt and resp.status_code == 404:
+                    # An earlier attempt may have deleted it before failing to report back
+                    logger.debug(f"{method} {endpoint} found nothing to delete on retry {attempt}; treating it as done")
+                    return resp
+                if resp.status_code not in RETRY_STATUSES or not retryable or last_attempt:
+                    if attempt and resp.status_code in RETRY_STATUSES:
+                        self.stats.retries_exhausted += 1
+                    resp.raise_for_status()
+                    return resp
+                delay = max(self.retry.backoff(attempt), retry_after(resp) or 0.0)
+                reason = f"HTTP {resp.status_code}"
+            attempt += 1
+            self.stats.retries += 1
+            logger.debug(f"{method} {endpoint} failed ({reason}); retry {attempt} of {self.retry.attempts - 1} in {delay:.2f}s")
+            await asyncio.sleep(delay)
 
     async def is_admin(self) -> bool:
         """
@@ -105,14 +517,10 @@ class CMLClient(object):
         if self.admin is not None:
             return self.admin
 
-        await self.check_authentication()
         try:
-            resp = await self.client.get(f"{self.base_url}/api/v0/users/{self.username}/id")
-            resp.raise_for_status()
-            user_id = resp.json()
-            resp = await self.client.get(f"{self.base_url}/api/v0/users/{user_id}")
-            resp.raise_for_status()
-            self.admin = resp.json().get("admin", False)
+            user_id = await self.get(f"/users/{self.username}/id")
+            user = await self.get(f"/users/{user_id}")
+            self.admin = user.get("admin", False)
             return self.admin
         except Exception as e:
             logger.error(f"Error checking admin status: {e}", exc_info=True)
@@ -123,32 +531,76 @@ class CMLClient(object):
         Make a GET request to the CML API.
         Ensures that calls to /nodes include ?operational=true for CML 2.8 compatibility.
         """
-        await self.check_authentication()
-
         # In CML 2.8, you only get the "operational" block if you ask for it
         if endpoint.startswith("/nodes") or "/nodes" in endpoint:
             params = params or {}
             params.setdefault("operational", "true")
 
+        key = (endpoint, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items())))
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(asyncio.create_task(self._get(endpoint, params)))
+            flight.task.add_done_callback(lambda task: self._land(key, task))
+        else:
+            self.stats.coalesced += 1
+        flight.waiters += 1
+        try:
+            # Shielded so that a caller giving up does not cancel the request for the others
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+        # Everyone else has taken their copy by the time the last waiter gets here,
+        # so it alone can have the original
+        return result if flight.waiters == 0 else copy.deepcopy(result)
+
+    def _land(self, key: tuple, task: asyncio.Task) -> None:
+        self._flights.pop(key, None)
+        # Mark any error as seen, in case every waiter gave up before the request finished
+        if not task.cancelled():
+            task.exception()
+
+    async def _get(self, endpoint: str, params: dict | None) -> Any:
         url = f"{self.api_base}{endpoint}"
         try:
-            resp = await self.client.get(url, params=params)
-            resp.raise_for_status()
+            resp = await self._request("GET", endpoint, params=params)
             return resp.json()
         except httpx.RequestError as e:
             logger.error(f"Error making GET request to {url}: {e}", exc_info=True)
             raise e
 
+    async def get_text(self, endpoint: str, params: dict | None = None) -> str:
+        """
+        Make a GET request to the CML API for a non-JSON resource (e.g., a pyATS testbed) and return the body as text.
+        """
+        url = f"{self.api_base}{endpoint}"
+        try:
+            resp = await self._request("GET", endpoint, params=params)
+            return resp.text
+        except httpx.RequestError as e:
+            logger.error(f"Error making GET request to {url}: {e}", exc_info=True)
+            raise e
+
+    async def get_pyats_testbed(self, lid: str, hostname: str | None = None) -> str:
+        """
+        Get the pyATS testbed YAML for a lab.
+
+        Args:
+            lid (str): The lab ID.
+            hostname (str | None): The controller address to put in the testbed, if not the one the controller reports.
 
-    async def post(self, endpoint: str, data: dict | None = None, params: dict | None = None) -> Any | None:
+        Returns:
+            str: The testbed YAML.
+        """
+        return await self.get_text(f"/labs/{lid}/pyats_testbed", params={"hostname": hostname} if hostname else None)
+
+    async def post(self, endpoint: str, data: dict | None = None, params: dict | None = None, idempotent: bool = False) -> Any | None:
         """
         Make a POST request to the CML API.
+        Pass idempotent=True if repeating the request has no further effect, so that it may be retried.
         """
-        await self.check_authentication()
         url = f"{self.api_base}{endpoint}"
         try:
-            resp = await self.client.post(url, json=data, params=params)
-            resp.raise_for_status()
+            resp = await self._request("POST", endpoint, idempotent=idempotent, json=data, params=params)
             if resp.status_code == 204:  # No content
                 return None
             return resp.json()
@@ -160,11 +612,9 @@ class CMLClient(object):
         """
         Make a PUT request to the CML API.
         """
-        await self.check_authentication()
         url = f"{self.api_base}{endpoint}"
         try:
-            resp = await self.client.put(url, json=data)
-            resp.raise_for_status()
+            resp = await self._request("PUT", endpoint, json=data)
             if resp.status_code == 204:  # No content
                 return None
             return resp.json()
@@ -176,27 +626,24 @@ class CMLClient(object):
         """
         Make a DELETE request to the CML API.
         """
-        await self.check_authentication()
         url = f"{self.api_base}{endpoint}"
         try:
-            resp = await self.client.delete(url)
-            resp.raise_for_status()
-            if resp.status_code == 204:  # No content
+            resp = await self._request("DELETE", endpoint)
+            if resp.status_code in (204, 404):  # No content, or already deleted by an earlier attempt
                 return None
             return resp.json()
         except httpx.RequestError as e:
             logger.error(f"Error making DELETE request to {url}: {e}", exc_info=True)
             raise e
 
-    async def patch(self, endpoint: str, data: dict | None = None) -> Any | None:
+    async def patch(self, endpoint: str, data: dict | None = None, idempotent: bool = False) -> Any | None:
         """
         Make a PATCH request to the CML API.
+        Pass idempotent=True if repeating the request has no further effect, so that it may be retried.
         """
-        await self.check_authentication()
         url = f"{self.api_base}{endpoint}"
         try:
-            resp = await self.client.patch(url, json=data)
-            resp.raise_for_status()
+            resp = await self._request("PATCH", endpoint, idempotent=idempotent, json=data)
             if resp.status_code == 204:  # No content
                 return None
             return resp.json()
@@ -0,0 +1,256 @@
+# Copyright (c) 2025  Cisco Systems, Inc.
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+
+import asyncio
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from websockets.asyncio.client import connect
+
+from .cml_client import CMLClient, ssl_context
+from .polling import POLL_INTERVAL_MAX, POLL_INTERVAL_MIN
+from .schemas.simple_core.common.events import (
+    BootEventType,
+    BootProgressDiagnosticEvent,
+    LabEventElementType,
+    LabEventType,
+)
+
+logger = logging.getLogger("cml-mcp")
+
+RECONNECT_DELAY_MIN = 1.0  # seconds
+RECONNECT_DELAY_MAX = 30.0  # seconds
+# While the event stream is up, polling is only a safety net for missed events, but it
+# never backs off further than this so that a missed event cannot make a wait slower
+EVENT_BACKED_POLL_INTERVAL = 3.0  # seconds
+
+# Lab events arrive as {"event_type": "lab_event", "event": "state" | "modified" | ...,
+# "element_type": "node" | "lab" | ..., "lab_id": ...}; the wire names of the event types
+# differ from the schema's, so they are mapped here.
+LAB_EVENT_TYPE = "lab_event"
+LAB_EVENTS = {
+    "created": LabEventType.ADD,
+    "deleted": LabEventType.REMOVE,
+    "modified": LabEventType.CHANGE,
+    "state": LabEventType.STATE_CHANGED,
+}
+# Only a state change of a lab or one of its nodes can move it towards (or away from)
+# convergence; edits to its topology, annotations, etc. cannot.
+CONVERGENCE_ELEMENTS = {LabEventElementType.LAB, LabEventElementType.NODE}
+
+EventListener = Callable[[dict[str, Any]], None]
+
+
+def event_lab_id(message: dict[str, Any]) -> str | None:
+    """
+    Return the ID of the lab an event message refers to, if any.
+    """
+    data = message.get("data")
+    return message.get("lab_id") or (data.get("lab_id") if isinstance(data, dict) else None)
+
+
+def decode_lab_event(message: dict[str, Any]) -> tuple[LabEventType, LabEventElementType] | None:
+    """
+    Decode a lab event message into its event and element types, or return None if it is not one.
+    """
+    if str(message.get("event_type", "")).lower() != LAB_EVENT_TYPE:
+        return None
+    event = LAB_EVENTS.get(str(message.get("event", "")).lower())
+    try:
+        element = LabEventElementType[str(message.get("element_type", "")).upper()]
+    except KeyError:
+        return None
+    return (event, element) if event is not None else None
+
+
+def decode_boot_event(message: dict[str, Any]) -> BootProgressDiagnosticEvent | None:
+    """
+    Decode a node boot progress message (see BootProgressDiagnosticEvent.as_dict()), or return None if it is not one.
+    """
+    lid, nid = message.get("lab_id"), message.get("node_id")
+    if lid is None or nid is None:
+        return None
+    try:
+        event = BootEventType[str(message.get("event", "")).upper()]
+    except KeyError:
+        return None
+    return BootProgressDiagnosticEvent(lab_id=lid, node_id=nid, event=event)
+
+
+def is_convergence_event(message: dict[str, Any]) -> bool:
+    """
+    Check whether an event message reports a lab or node state change, or a node finishing its boot.
+    """
+    lab_event = decode_lab_event(message)
+    if lab_event is not None:
+        event, element = lab_event
+        return event is LabEventType.STATE_CHANGED and element in CONVERGENCE_ELEMENTS
+    boot_event = decode_boot_event(message)
+    return boot_event is not None and boot_event.event is BootEventType.BOOTED
+
+
+class ControllerEventStream(object):
+    """
+    A single websocket subscription to the CML controller's event feed, shared by every
+    listener in the process.
+
+    The connection is opened when the first listener subscribes and closed when the last
+    one unsubscribes.  If the connection drops it is re-established with backoff; while it
+    is down, `connected` is False and listeners are expected to fall back to polling.
+    """
+
+    def __init__(self, client: CMLClient, path: str):
+        self.client = client
+        self.url = f"{client.base_url.replace('http', 'ws', 1)}{path}"
+        self.connected = False
+        self._listeners: set[EventListener] = set()
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, listener: EventListener) -> None:
+        self._listeners.add(listener)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def unsubscribe(self, listener: EventListener) -> None:
+        self._listeners.discard(listener)
+        if not self._listeners and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self.connected = False
+
+    def _dispatch(self, raw: str | bytes) -> None:
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return
+        if not isinstance(message, dict):
+            return
+        for listener in list(self._listeners):
+            try:
+                listener(message)
+            except Exception as e:
+                logger.error(f"Error in controller event listener: {str(e)}", exc_info=True)
+
+    async def _run(self) -> None:
+        delay = RECONNECT_DELAY_MIN
+        while True:
+            try:
+                await self.client.check_authentication()
+                async with connect(
+                    self.url,
+                    additional_headers={"Authorization": f"Bearer {self.client.token}"},
+                    ssl=ssl_context if self.url.startswith("wss") else None,
+                ) as ws:
+                    self.connected = True
+                    delay = RECONNECT_DELAY_MIN
+                    logger.debug(f"Subscribed to controller events at {self.url}")
+                    async for raw in ws:
+                        self._dispatch(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"Controller event stream unavailable ({str(e)}), retrying in {delay:.0f}s")
+            self.connected = False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+
+class _LabWaiters(object):
+    def __init__(self) -> None:
+        self.count = 0
+        self.changed = asyncio.Event()
+
+    def notify(self) -> None:
+        # Swap in a fresh event so that each waiter sees every wake-up exactly once
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class ConvergenceWaiter(object):
+    """
+    Waits for labs and nodes to converge, woken by controller events.
+
+    All waiters share the controller event stream, and all waiters on the same lab share
+    one wake-up signal.  Each wake-up (or poll) costs a single convergence check.  If the
+    event stream is unavailable, the waiter polls with adaptive backoff instead.
+    """
+
+    def __init__(self, events: ControllerEventStream):
+        self.events = events
+        self._labs: dict[str, _LabWaiters] = {}
+
+    def _on_event(self, message: dict[str, Any]) -> None:
+        lid = event_lab_id(message)
+        if lid is not None and lid in self._labs and is_convergence_event(message):
+            self._labs[lid].notify()
+
+    def _register(self, lid: str) -> _LabWaiters:
+        if not self._labs:
+            self.events.subscribe(self._on_event)
+        waiters = self._labs.setdefault(lid, _LabWaiters())
+        waiters.count += 1
+        return waiters
+
+    def _unregister(self, lid: str) -> None:
+        waiters = self._labs[lid]
+        waiters.count -= 1
+        if waiters.count == 0:
+            del self._labs[lid]
+        if not self._labs:
+            self.events.unsubscribe(self._on_event)
+
+    async def wait(self, lid: str, check: Callable[[], Awaitable[bool]], timeout: float) -> None:
+        """
+        Wait until check() returns True.
+
+        Args:
+            lid (str): The lab the check concerns; events for this lab trigger a re-check.
+            check (Callable[[], Awaitable[bool]]): Returns True once converged.
+            timeout (float): Seconds to wait before giving up.
+
+        Raises:
+            TimeoutError: If the lab or node has not converged within the timeout.
+        """
+        deadline = time.monotonic() + timeout
+        waiters = self._register(lid)
+        interval = POLL_INTERVAL_MIN
+        try:
+            while True:
+                changed = waiters.changed
+                if await check():
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Lab {lid} did not converge within {timeout:.0f} seconds")
+                poll = min(interval, EVENT_BACKED_POLL_INTERVAL) if self.events.connected else interval
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=min(poll, remaining))
+                    interval = POLL_INTERVAL_MIN
+                except asyncio.TimeoutError:
+                    interval = min(interval * 2, POLL_INTERVAL_MAX)
+        finally:
+            self._unregister(lid)
@@ -0,0 +1,71 @@
+# Copyright (c) 2025  Cisco Systems, Inc.
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+POLL_INTERVAL_MIN = 0.5  # seconds
+POLL_INTERVAL_MAX = 5.0  # seconds
+
+
+async def poll_until(
+    check: Callable[[], Awaitable[T]],
+    done: Callable[[T], bool],
+    deadline: float,
+    interval: float = POLL_INTERVAL_MIN,
+    max_interval: float = POLL_INTERVAL_MAX,
+) -> T:
+    """
+    Poll the controller until a condition holds, backing off between attempts.
+
+    The first check happens immediately.  After each miss, the delay doubles (up to
+    max_interval) so fast transitions are noticed quickly without hammering the
+    controller during slow ones.
+
+    Args:
+        check (Callable[[], Awaitable[T]]): Fetches the current value.
+        done (Callable[[T], bool]): Returns True once the value is the one we are waiting for.
+        deadline (float): Give up at this time, as returned by time.monotonic().
+        interval (float): The initial delay between checks, in seconds.
+        max_interval (float): The largest delay between checks, in seconds.
+
+    Returns:
+        T: The first value for which done() returned True.
+
+    Raises:
+        TimeoutError: If the deadline passes first.
+    """
+    while True:
+        value = await check()
+        if done(value):
+            return value
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Condition not met before the deadline (last value: {value!r})")
+        await asyncio.sleep(min(interval, remaining))
+        interval = min(interval * 2, max_interval)
@@ -0,0 +1,98 @@
+# Copyright (c) 2025  Cisco Systems, Inc.
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+
+from functools import lru_cache
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, create_model
+
+
+@lru_cache(maxsize=128)
+def projection_model(model: type[BaseModel], fields: tuple[str, ...]) -> type[BaseModel]:
+    """
+    Build (once) a model that validates only the given fields of another model.
+
+    The projected fields keep their original types and constraints, so the values
+    are validated exactly as they would be by the full model.
+
+    Args:
+        model (type[BaseModel]): The full model.
+        fields (tuple[str, ...]): The fields to keep.
+
+    Returns:
+        type[BaseModel]: A model containing only those fields.
+
+    Raises:
+        ValueError: If any of the fields is not a field of the model.
+    """
+    unknown = [name for name in fields if name not in model.model_fields]
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s) for {model.__name__}: {', '.join(unknown)}. Valid fields are: {', '.join(model.model_fields)}."
+        )
+    return create_model(
+        f"{model.__name__}Projection",
+        __config__=ConfigDict(extra="ignore"),
+        **{name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields},
+    )
+
+
+def project(model: type[BaseModel], data: dict[str, Any], fields: list[str] | None) -> dict[str, Any]:
+    """
+    Validate an API object and return only the requested fields.
+
+    Fields that were not requested are neither validated nor serialized.  If no fields
+    are requested, the whole object is validated with the full model.
+
+    Args:
+        model (type[BaseModel]): The model describing the object.
+        data (dict[str, Any]): The raw object as returned by the CML API.
+        fields (list[str] | None): The fields to return, or None for all of them.
+
+    Returns:
+        dict[str, Any]: The validated object, in JSON-compatible form.
+    """
+    if not fields:
+        return model(**data).model_dump(mode="json")
+    names = tuple(dict.fromkeys(fields))
+    return projection_model(model, names).model_validate({name: data[name] for name in names if name in data}).model_dump(
+        mode="json"
+    )
+
+
+def project_all(model: type[BaseModel], items: list[dict[str, Any]], fields: list[str] | None) -> list[Any]:
+    """
+    Validate a list of API objects, returning full models or, if fields are requested, projected dicts.
+
+    Args:
+        model (type[BaseModel]): The model describing the objects.
+        items (list[dict[str, Any]]): The raw objects as returned by the CML API.
+        fields (list[str] | None): The fields to return, or None for full models.
+
+    Returns:
+        list[Any]: Model instances if no fields were requested, otherwise dicts with only those fields.
+    """
+    if not fields:
+        return [model(**item) for item in items]
+    return [project(model, item, fields) for item in items]
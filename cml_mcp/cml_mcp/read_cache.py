@@ -0,0 +1,194 @@
+# Copyright (c) 2025  Cisco Systems, Inc.
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+
+import copy
+import logging
+import re
+import time
+from typing import Any
+
+from cachetools import TLRUCache
+
+from .cml_client import CMLClient
+from .event_stream import ControllerEventStream, event_lab_id
+from .schemas.simple_core.common.events import LabEventElementType
+
+logger = logging.getLogger("cml-mcp")
+
+_ID = r"[^/]+"
+
+# Cacheable resources: path pattern, seconds an entry lives, and whether the entry
+# relies on controller events to notice changes made outside this server (e.g., in
+# the CML UI).  Event-backed entries are only served while the event stream is up.
+# No event covers users and groups, so they are only kept long enough to absorb bursts.
+# Anything not listed here (state, convergence, system health...) is never cached.
+RESOURCE_TTLS: list[tuple[re.Pattern, float, bool]] = [
+    (re.compile(r"^/users(/[^/]+(/id)?)?$"), 5.0, False),
+    (re.compile(r"^/groups(/[^/]+)?$"), 5.0, False),
+    (re.compile(r"^/labs$"), 60.0, True),
+    (re.compile(rf"^/labs/{_ID}$"), 300.0, True),
+    (re.compile(rf"^/labs/{_ID}/(links|interfaces|annotations)$"), 300.0, True),
+    (re.compile(rf"^/labs/{_ID}/nodes/{_ID}/interfaces$"), 300.0, True),
+    # Node listings include operational state, so keep them briefly even with events
+    (re.compile(rf"^/labs/{_ID}/nodes(/{_ID})?$"), 15.0, True),
+]
+
+# Event element types that can change what a lab listing shows
+LAB_LIST_ELEMENTS = {LabEventElementType.LAB.name}
+
+
+def resource_policy(path: str) -> tuple[float, bool] | None:
+    """
+    Return the (TTL, event-backed) policy for a resource path, or None if it is not cacheable.
+    """
+    for pattern, ttl, event_backed in RESOURCE_TTLS:
+        if pattern.match(path):
+            return ttl, event_backed
+    return None
+
+
+class ReadCache(object):
+    """
+    A read-through cache of controller resources, keyed by resource path and parameters.
+
+    Each kind of resource has its own TTL (see RESOURCE_TTLS) and the least recently
+    used entries are evicted once the cache is full.  Write tools invalidate what they
+    change, and controller events invalidate everything under the lab they concern.
+    While the event stream is down, lab resources are read from the controller, and
+    the cache is cleared when the stream reconnects, since events may have been missed.
+
+    A read that was in flight when its entry was invalidated is returned to its caller
+    but not cached, since it may predate the change that caused the invalidation.
+
+    Callers get their own copy of cached values, so they may modify them.
+    """
+
+    def __init__(self, client: CMLClient, events: ControllerEventStream, maxsize: int):
+        self.client = client
+        self.events = events
+        self.hits = 0
+        self.misses = 0
+        self._subscribed = False
+        self._was_connected = False
+        # Invalidation generation, and the generation at which each (path, prefix) was last
+        # invalidated.  Invalidations only matter to reads that were in flight when they
+        # happened, so they are only recorded while reads are in flight and are forgotten
+        # once every read that started before them has finished.
+        self._generation = 0
+        self._cleared = 0
+        self._invalidated: dict[tuple[str, bool], int] = {}
+        # Generation at which each in-flight read started -> number of such reads
+        self._in_flight: dict[int, int] = {}
+        self._cache: TLRUCache = TLRUCache(maxsize=maxsize, ttu=self._expires, timer=time.monotonic)
+
+    @staticmethod
+    def _expires(key: tuple, value: Any, now: float) -> float:
+        return now + resource_policy(key[0])[0]
+
+    def _on_event(self, message: dict[str, Any]) -> None:
+        lid = event_lab_id(message)
+        if lid is None:
+            return
+        self.invalidate(f"/labs/{lid}")
+        element = str(message.get("element_type", "")).upper()
+        if not element or element in LAB_LIST_ELEMENTS or "users" in message:
+            self.invalidate("/labs", prefix=False)
+
+    def _check_events(self) -> bool:
+        # The subscription is made lazily because it needs a running event loop
+        if not self._subscribed:
+            self.events.subscribe(self._on_event)
+            self._subscribed = True
+        connected = self.events.connected
+        if connected and not self._was_connected:
+            self.clear()
+        self._was_connected = connected
+        return connected
+
+    async def get(self, endpoint: str, params: dict | None = None) -> Any:
+        """
+        GET a resource, from the cache if possible.
+        """
+        policy = resource_policy(endpoint)
+        connected = self._check_events()
+        if policy is None or (policy[1] and not connected):
+            return await self.client.get(endpoint, params=params)
+        key = (endpoint, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items())))
+        try:
+            value = self._cache[key]
+            self.hits += 1
+        except KeyError:
+            self.misses += 1
+            generation = self._generation
+            self._in_flight[generation] = self._in_flight.get(generation, 0) + 1
+            try:
+                value = await self.client.get(endpoint, params=params)
+                if not self._invalidated_since(endpoint, generation):
+                    self._cache[key] = copy.deepcopy(value)
+            finally:
+                self._read_done(generation)
+            return value
+        return copy.deepcopy(value)
+
+    def _invalidated_since(self, endpoint: str, generation: int) -> bool:
+        if self._cleared > generation:
+            return True
+        return any(
+            gen > generation and (endpoint == path or (prefix and endpoint.startswith(f"{path}/")))
+            for (path, prefix), gen in self._invalidated.items()
+        )
+
+    def _read_done(self, generation: int) -> None:
+        self._in_flight[generation] -= 1
+        if not self._in_flight[generation]:
+            del self._in_flight[generation]
+        # Forget invalidations that no read still in flight predates
+        oldest = min(self._in_flight, default=None)
+        if oldest is None:
+            self._invalidated.clear()
+        else:
+            for path_key in [path_key for path_key, gen in self._invalidated.items() if gen <= oldest]:
+                del self._invalidated[path_key]
+
+    def invalidate(self, path: str, prefix: bool = True) -> None:
+        """
+        Drop cached entries for a resource path and, if prefix is True, everything beneath it.
+        """
+        self._generation += 1
+        if self._in_flight:
+            self._invalidated[(path, prefix)] = self._generation
+        stale = [key for key in list(self._cache) if key[0] == path or (prefix and key[0].startswith(f"{path}/"))]
+        for key in stale:
+            self._cache.pop(key, None)
+        if stale:
+            logger.debug(f"Invalidated {len(stale)} cached read(s) for {path}")
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._cleared = self._generation
+        self._invalidated.clear()
+        self._cache.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {"entries": len(self._cache), "max_entries": self._cache.maxsize, "hits": self.hits, "misses": self.misses}
@@ -1,22 +1,33 @@
 import os
 import requests
 import asyncio
+import concurrent.futures
+import hashlib
+import json
 import logging
-import tempfile
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from typing import Any
 from fastmcp import FastMCP
 from fastmcp.server.auth.providers.github import GitHubProvider
 
+import diskcache
 import httpx
+from cachetools import TTLCache
 from fastmcp import Context, FastMCP
 from fastmcp.exceptions import ToolError
 from mcp.shared.exceptions import McpError
 from mcp.types import METHOD_NOT_FOUND
-from virl2_client.models.cl_pyats import ClPyats, PyatsNotInstalled
-
-from .cml_client import CMLClient
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from .cli_pool import CliWorkerPool, PyatsSessionPool
+from .cml_client import CMLClient, RetryPolicy
+from .event_stream import ControllerEventStream, ConvergenceWaiter
+from .projection import project, project_all
+from .read_cache import ReadCache
 from .schemas.annotations import EllipseAnnotation, LineAnnotation, RectangleAnnotation, TextAnnotation
-from .schemas.common import DefinitionID, UserName, UUID4Type
+from .schemas.common import DefinitionID, Tag, UserName, UUID4Type
 from .schemas.groups import GroupCreate, GroupInfoResponse
 from .schemas.interfaces import InterfaceCreate
 from .schemas.labs import Lab, LabCreate, LabTitle
@@ -24,11 +35,25 @@ from .schemas.labs import Lab, LabCreate, LabTitle
 # from cml_mcp.schemas.licensing import LicensingStatus
 from .schemas.links import Link, LinkConditionConfiguration, LinkCreate
 from .schemas.node_definitions import NodeDefinition
-from .schemas.nodes import Node, NodeConfigurationContent, NodeCreate, NodeLabel
+from .schemas.nodes import Node, NodeConfigurationContent, NodeCreate, NodeLabel, NodeStates
 from .schemas.system import SystemHealth, SystemInformation, SystemStats
 from .schemas.topologies import Topology
 from .schemas.users import UserCreate, UserResponse
-from .types import SimplifiedInterfaceResponse, SuperSimplifiedNodeDefinitionResponse
+from .teardown import teardown_lab, teardown_many, teardown_node
+from .topology_apply import apply_topology
+from .topology_builder import build_topology
+from .topology_compiler import compile_topology, parse_topology_spec, spec_node_definitions
+from .types import (
+    AppliedTopology,
+    BuiltTopology,
+    CliResult,
+    LabelLinkCreate,
+    NodePage,
+    SimplifiedInterfaceResponse,
+    SimplifiedInterfaces,
+    SuperSimplifiedNodeDefinitionResponse,
+    TeardownResult,
+)
 from cml_mcp.settings import settings
 
 # Determine log level (default INFO unless DEBUG env var is "true")
@@ -56,7 +81,43 @@ file_handler.setLevel(logging.DEBUG)
 file_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
 
-cml_client = CMLClient(host=str(settings.cml_url), username=settings.cml_username, password=settings.cml_password)
+# Shared by the worker processes when serving with several of them (see __main__)
+shared_store = diskcache.Cache(settings.shared_store_dir) if settings.server_workers > 1 else None
+
+cml_client = CMLClient(
+    host=str(settings.cml_url),
+    username=settings.cml_username,
+    password=settings.cml_password,
+    limits=httpx.Limits(
+        max_connections=settings.cml_pool_max_connections,
+        max_keepalive_connections=settings.cml_pool_max_keepalive,
+        keepalive_expiry=settings.cml_keepalive_expiry,
+    ),
+    timeout=httpx.Timeout(
+        connect=settings.cml_connect_timeout,
+        read=settings.cml_read_timeout,
+        write=settings.cml_write_timeout,
+        pool=settings.cml_pool_timeout,
+    ),
+    http2=settings.cml_http2,
+    retry=RetryPolicy(settings.cml_retry_attempts, settings.cml_retry_base_delay, settings.cml_retry_max_delay),
+    breaker_threshold=settings.cml_breaker_threshold,
+    breaker_reset=settings.cml_breaker_reset,
+    token_store=shared_store,
+)
+
+# Shared controller event subscription, used to wake convergence waiters
+event_stream = ControllerEventStream(cml_client, settings.cml_events_path)
+convergence_waiter = ConvergenceWaiter(event_stream)
+# Read-through cache of controller resources, kept fresh by write tools and controller events
+read_cache = ReadCache(cml_client, event_stream, settings.read_cache_size)
+
+# Warm pyATS console connections reused across send_cli_command calls, driven from worker threads
+cli_pool = CliWorkerPool(
+    PyatsSessionPool(settings.cml_username, settings.cml_password, settings.cli_session_idle_ttl),
+    settings.cli_workers,
+    settings.cli_queue_size,
+)
 
 # -------------------- GitHub Provider --------------------
 auth = GitHubProvider(
@@ -65,8 +126,103 @@ auth = GitHubProvider(
     base_url=os.getenv("ROOT_URL")
 )
 
+WARMUP_RETRY_MAX = 60.0  # seconds
+warmup_task: asyncio.Task | None = None
+
+
+async def warm_up() -> None:
+    """
+    Log in to the controller and load what the first tool calls will need, retrying until the controller answers.
+
+    Runs in the background so that the server starts serving immediately, whatever state the controller is in.
+    """
+    delay = 1.0
+    while True:
+        try:
+            await cml_client.check_authentication()
+            await asyncio.gather(get_simplified_node_definitions(), read_cache.get("/labs", params={"show_all": True}))
+            logger.info("Connected to the CML controller")
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"CML controller not reachable yet ({str(e) or type(e).__name__}), retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WARMUP_RETRY_MAX)
+
+
+def warmed_up() -> bool:
+    return warmup_task is not None and warmup_task.done() and not warmup_task.cancelled() and warmup_task.exception() is None
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    global warmup_task
+    warmup_task = asyncio.create_task(warm_up())
+    evict_task = asyncio.create_task(cli_pool.evict_idle_sessions())
+    try:
+        yield
+    finally:
+        warmup_task.cancel()
+        evict_task.cancel()
+        # Disconnecting sessions blocks, so keep it off the event loop
+        await asyncio.to_thread(cli_pool.shutdown)
+        await cml_client.close()
+
+
 # -------------------- FastMCP Init --------------------
-server_mcp = FastMCP(name="cml-mcp", auth=auth)
+server_mcp = FastMCP(name="cml-mcp", auth=auth, lifespan=lifespan)
+
+
+def create_app() -> Any:
+    """
+    Build the MCP HTTP application for a worker process (see __main__).
+
+    Sessions are stateless, since consecutive requests from one client may reach different workers.
+    """
+    return server_mcp.http_app(stateless_http=True)
+
+
+def health_report() -> dict[str, Any]:
+    return {
+        "pid": os.getpid(),
+        "warmed_up": warmed_up(),
+        "controller": cml_client.health(),
+        "event_stream_connected": event_stream.connected,
+        "read_cache": read_cache.stats(),
+    }
+
+
+@server_mcp.custom_route("/healthz", methods=["GET"])
+async def healthz(request: Request) -> JSONResponse:
+    """
+    Liveness: the server is up.  Also reports controller reachability, token state and pool warmth.
+    """
+    return JSONResponse({"status": "ok", **health_report()})
+
+
+@server_mcp.custom_route("/readyz", methods=["GET"])
+async def readyz(request: Request) -> JSONResponse:
+    """
+    Readiness: the server has reached the controller and the controller is not known to be down.
+    """
+    report = health_report()
+    ready = report["warmed_up"] and report["controller"]["reachable"]
+    return JSONResponse({"status": "ready" if ready else "not ready", **report}, status_code=200 if ready else 503)
+
+def lab_changed(lid: UUID4Type | None = None, listing: bool = False) -> None:
+    """
+    Drop cached reads made stale by a change to a lab, and/or to the list of labs.
+
+    Args:
+        lid (UUID4Type | None): The lab that changed, if any.
+        listing (bool): Whether labs were created or deleted.
+    """
+    if lid is not None:
+        read_cache.invalidate(f"/labs/{lid}")
+    if listing:
+        read_cache.invalidate("/labs", prefix=False)
+
 
 async def get_all_labs() -> list[UUID4Type]:
     """
@@ -75,20 +231,142 @@ async def get_all_labs() -> list[UUID4Type]:
     Returns:
         list[UUID4Type]: A list of lab IDs.
     """
-    labs = await cml_client.get("/labs", params={"show_all": True})
+    labs = await read_cache.get("/labs", params={"show_all": True})
     return [UUID4Type(lab) for lab in labs]
 
 
+async def iter_lab_details(labs: list[UUID4Type]) -> AsyncIterator[dict[str, Any]]:
+    """
+    Fetch the details of many labs concurrently, yielding each one as soon as it arrives.
+
+    At most settings.cml_max_concurrency requests are in flight at once.  Labs that
+    disappear between listing and fetching (404) are skipped.  If the caller stops
+    iterating early, the outstanding requests are cancelled.
+
+    Args:
+        labs (list[UUID4Type]): The lab IDs to fetch.
+
+    Yields:
+        dict[str, Any]: The raw lab details, in completion order.
+    """
+    sem = asyncio.Semaphore(settings.cml_max_concurrency)
+
+    async def fetch(lid: UUID4Type) -> dict[str, Any] | None:
+        async with sem:
+            try:
+                return await read_cache.get(f"/labs/{lid}")
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == 404:
+                    return None
+                raise
+
+    tasks = [asyncio.create_task(fetch(lid)) for lid in labs]
+    try:
+        for fut in asyncio.as_completed(tasks):
+            lab_details = await fut
+            if lab_details is not None:
+                yield lab_details
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+# Title -> lab ID index so that title lookups do not have to scan every lab on the
+# controller.  It is filled by a concurrent sweep and kept current by the tools
+# that create, rename or delete labs.  Entries are always verified before use.
+lab_title_index: dict[str, UUID4Type] = {}
+_lab_title_sweep: asyncio.Task | None = None
+
+
+def index_lab_title(lid: UUID4Type, title: str | None) -> None:
+    """
+    Record (or replace) the title of a lab in the title index.
+
+    Args:
+        lid (UUID4Type): The lab ID.
+        title (str | None): The lab's current title.  If None, the lab is only removed.
+    """
+    forget_lab_title(lid)
+    if title:
+        lab_title_index[str(title)] = UUID4Type(lid)
+
+
+def forget_lab_title(lid: UUID4Type) -> None:
+    """
+    Remove every title index entry pointing at a lab.
+
+    Args:
+        lid (UUID4Type): The lab ID.
+    """
+    for title in [t for t, indexed in lab_title_index.items() if indexed == str(lid)]:
+        del lab_title_index[title]
+
+
+async def _sweep_lab_titles() -> dict[str, dict[str, Any]]:
+    by_title: dict[str, dict[str, Any]] = {}
+    labs = await get_all_labs()
+    async for lab in iter_lab_details(labs):
+        by_title.setdefault(lab["lab_title"], lab)
+    lab_title_index.clear()
+    lab_title_index.update({title: UUID4Type(lab["id"]) for title, lab in by_title.items()})
+    logger.debug(f"Lab title index rebuilt with {len(lab_title_index)} entries")
+    return by_title
+
+
+async def refresh_lab_title_index() -> dict[str, dict[str, Any]]:
+    """
+    Rebuild the title index from the controller in one concurrent sweep.
+
+    Concurrent callers share a single sweep rather than starting their own.
+
+    Returns:
+        dict[str, dict[str, Any]]: The raw lab details keyed by lab title.
+    """
+    global _lab_title_sweep
+    if _lab_title_sweep is None or _lab_title_sweep.done():
+        _lab_title_sweep = asyncio.create_task(_sweep_lab_titles())
+    return await asyncio.shield(_lab_title_sweep)
+
+
+async def find_lab_by_title(title: str) -> dict[str, Any] | None:
+    """
+    Look up a lab's details by title using the title index.
+
+    A warm index hit costs one request (to verify the lab still has that title).  On a
+    miss or a stale entry, the index is rebuilt from the controller before giving up.
+
+    Args:
+        title (str): The lab title.
+
+    Returns:
+        dict[str, Any] | None: The raw lab details, or None if no lab has that title.
+    """
+    lid = lab_title_index.get(title)
+    if lid is not None:
+        try:
+            lab = await cml_client.get(f"/labs/{lid}")
+            if lab.get("lab_title") == title:
+                return lab
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 404:
+                raise
+        forget_lab_title(lid)
+    return (await refresh_lab_title_index()).get(title)
+
+
 @server_mcp.tool(
     annotations={
         "title": "Get All CML Labs",
         "readOnlyHint": True,
     }
 )
-async def get_cml_labs(user: UserName = settings.cml_username) -> list[Lab]:
+async def get_cml_labs(user: UserName = settings.cml_username, fields: list[str] | None = None) -> list[Lab] | list[dict[str, Any]]:
     """
     Get the list of labs for a specific user or all labs if the user is an admin.
     To get labs for the current user, leave the "user" argument blank.
+
+    If fields is given, only those attributes of each lab are returned (e.g., ["id", "lab_title", "state"]); this makes the
+    response smaller and faster.  Leave it empty to get every attribute.
     """
 
     # # Clients like to pass "null" as a string vs. null as a None type.
@@ -100,14 +378,13 @@ async def get_cml_labs(user: UserName = settings.cml_username) -> list[Lab]:
         if str(user) != settings.cml_username and not await cml_client.is_admin():
             raise ValueError("User is not an admin and cannot view all labs.")
         ulabs = []
-        # Get all labs from the CML server
+        # Get all labs from the CML server and fetch their details concurrently
         labs = await get_all_labs()
-        for lab in labs:
-            # For each lab, get its details
-            lab_details = await cml_client.get(f"/labs/{lab}")
+        async for lab_details in iter_lab_details(labs):
+            index_lab_title(lab_details["id"], lab_details.get("lab_title"))
             # Only include labs owned by the specified user
             if lab_details.get("owner_username") == str(user):
-                ulabs.append(Lab(**lab_details))
+                ulabs.append(project(Lab, lab_details, fields) if fields else Lab(**lab_details))
         return ulabs
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
@@ -122,13 +399,16 @@ async def get_cml_labs(user: UserName = settings.cml_username) -> list[Lab]:
         "readOnlyHint": True,
     }
 )
-async def get_cml_users() -> list[UserResponse]:
+async def get_cml_users(fields: list[str] | None = None) -> list[UserResponse] | list[dict[str, Any]]:
     """
     Get the list of users from the CML server.
+
+    If fields is given, only those attributes of each user are returned (e.g., ["id", "username", "admin"]); this makes the
+    response smaller and faster.  Leave it empty to get every attribute.
     """
     try:
-        users = await cml_client.get("/users")
-        return [UserResponse(**user) for user in users]
+        users = await read_cache.get("/users")
+        return project_all(UserResponse, users, fields)
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
     except Exception as e:
@@ -169,6 +449,9 @@ async def create_cml_user(user: UserCreate | dict) -> UUID4Type:
         if isinstance(user, dict):
             user = UserCreate(**user)
         resp = await cml_client.post("/users", data=user.model_dump(mode="json", exclude_none=True))
+        # Group memberships are listed on groups as well as users
+        read_cache.invalidate("/users")
+        read_cache.invalidate("/groups")
         return UUID4Type(resp["id"])
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
@@ -196,6 +479,8 @@ async def delete_cml_user(user_id: UUID4Type, ctx: Context) -> bool:
         
         # <-- moved this out of the if block
         await cml_client.delete(f"/users/{user_id}")
+        read_cache.invalidate("/users")
+        read_cache.invalidate("/groups")
         return True
 
     except httpx.HTTPStatusError as e:
@@ -211,13 +496,16 @@ async def delete_cml_user(user_id: UUID4Type, ctx: Context) -> bool:
         "readOnlyHint": True,
     }
 )
-async def get_cml_groups() -> list[GroupInfoResponse]:
+async def get_cml_groups(fields: list[str] | None = None) -> list[GroupInfoResponse] | list[dict[str, Any]]:
     """
     Get the list of groups from the CML server.
+
+    If fields is given, only those attributes of each group are returned (e.g., ["id", "name", "members"]); this makes the
+    response smaller and faster.  Leave it empty to get every attribute.
     """
     try:
-        groups = await cml_client.get("/groups")
-        return [GroupInfoResponse(**group) for group in groups]
+        groups = await read_cache.get("/groups")
+        return project_all(GroupInfoResponse, groups, fields)
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
     except Exception as e:
@@ -252,6 +540,8 @@ async def create_cml_group(group: GroupCreate | dict) -> UUID4Type:
         if isinstance(group, dict):
             group = GroupCreate(**group)
         resp = await cml_client.post("/groups", data=group.model_dump(mode="json", exclude_none=True))
+        read_cache.invalidate("/groups")
+        read_cache.invalidate("/users")
         return UUID4Type(resp["id"])
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
@@ -277,6 +567,8 @@ async def delete_cml_group(group_id: UUID4Type, ctx: Context) -> bool:
         if not await cml_client.is_admin():
             raise ValueError("Only admin users can delete groups.")
         await cml_client.delete(f"/groups/{group_id}")
+        read_cache.invalidate("/groups")
+        read_cache.invalidate("/users")
         return True
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
@@ -345,6 +637,23 @@ async def get_cml_statistics() -> SystemStats:
         raise ToolError(e)
 
 
+@server_mcp.tool(
+    annotations={
+        "title": "Get CML Client Transport Statistics",
+        "readOnlyHint": True,
+    }
+)
+async def get_cml_client_stats() -> dict[str, Any]:
+    """
+    Get connection pool statistics for this MCP server's connection to the CML server.
+
+    Includes request and connection-reuse counts, TLS handshakes, time spent waiting for
+    a pooled connection, the configured pool limits, retry counts and the state of the
+    circuit breaker ("open" means the CML server is considered down), and read cache hits and misses.
+    """
+    return {**cml_client.transport_stats(), "read_cache": read_cache.stats()}
+
+
 @server_mcp.tool(
     annotations={
         "title": "Get CML License Info",
@@ -379,8 +688,7 @@ async def get_cml_node_definitions() -> list[SuperSimplifiedNodeDefinitionRespon
     Get the list of node definitions from the CML server.
     """
     try:
-        node_definitions = await cml_client.get("/simplified_node_definitions")
-        return [SuperSimplifiedNodeDefinitionResponse(**nd) for nd in node_definitions]
+        return list((await get_simplified_node_definitions()).values())
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
     except Exception as e:
@@ -388,9 +696,45 @@ async def get_cml_node_definitions() -> list[SuperSimplifiedNodeDefinitionRespon
         raise ToolError(e)
 
 
+# Node definitions almost never change, so the validated models are kept for a while
+# rather than fetched and re-validated on every call.
+node_definition_cache: TTLCache = TTLCache(maxsize=settings.node_def_cache_size, ttl=settings.node_def_cache_ttl)
+SIMPLIFIED_NODE_DEFINITIONS_KEY = "simplified"
+NODE_DEFINITIONS_TAG = "node_definitions"
+
+
+async def get_shared(key: str, endpoint: str, params: dict | None = None) -> Any:
+    """
+    GET a node definition resource, sharing the response with the other worker processes, if there are any.
+    """
+    if shared_store is not None:
+        value = shared_store.get(key)
+        if value is not None:
+            return value
+    value = await cml_client.get(endpoint, params=params)
+    if shared_store is not None:
+        shared_store.set(key, value, expire=settings.node_def_cache_ttl, tag=NODE_DEFINITIONS_TAG)
+    return value
+
+
+async def get_simplified_node_definitions() -> dict[str, SuperSimplifiedNodeDefinitionResponse]:
+    """
+    Get all node definitions in simplified form, using the node definition cache.
+
+    Returns:
+        dict[str, SuperSimplifiedNodeDefinitionResponse]: The node definitions keyed by ID.
+    """
+    node_definitions = node_definition_cache.get(SIMPLIFIED_NODE_DEFINITIONS_KEY)
+    if node_definitions is None:
+        resp = await get_shared("node-definitions:simplified", "/simplified_node_definitions")
+        node_definitions = {nd.id: nd for nd in (SuperSimplifiedNodeDefinitionResponse(**nd) for nd in resp)}
+        node_definition_cache[SIMPLIFIED_NODE_DEFINITIONS_KEY] = node_definitions
+    return node_definitions
+
+
 async def get_node_def_details(did: DefinitionID) -> NodeDefinition:
     """
-    Get detailed information about a specific node definition by its ID.
+    Get detailed information about a specific node definition by its ID, using the node definition cache.
 
     Args:
         did (DefinitionID): The node definition ID.
@@ -398,8 +742,47 @@ async def get_node_def_details(did: DefinitionID) -> NodeDefinition:
     Returns:
         NodeDefinition: The node definition details.
     """
-    node_definition = await cml_client.get(f"/node_definitions/{did}", params={"json": True})
-    return NodeDefinition(**node_definition)
+    key = ("detail", str(did))
+    node_definition = node_definition_cache.get(key)
+    if node_definition is None:
+        resp = await get_shared(f"node-definitions:detail:{did}", f"/node_definitions/{did}", params={"json": True})
+        node_definition = node_definition_cache[key] = NodeDefinition(**resp)
+    return node_definition
+
+
+async def get_node_def_interfaces(did: DefinitionID) -> SimplifiedInterfaces:
+    """
+    Get the interface settings (counts, loopback, serial ports) of a node definition, using the node definition cache.
+
+    Args:
+        did (DefinitionID): The node definition ID.
+
+    Returns:
+        SimplifiedInterfaces: The node definition's interface settings.
+    """
+    try:
+        return (await get_simplified_node_definitions())[str(did)].device.interfaces
+    except KeyError:
+        raise ValueError(f"Node definition '{did}' does not exist.")
+
+
+@server_mcp.tool(
+    annotations={
+        "title": "Refresh Cached CML Node Definitions",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+        "idempotentHint": True,
+    }
+)
+async def invalidate_node_definition_cache() -> bool:
+    """
+    Discard this MCP server's cached node definitions so that the next request fetches them fresh from the CML server.
+    Use this after node definitions or images have been added, changed or removed on the CML server.
+    """
+    node_definition_cache.clear()
+    if shared_store is not None:
+        shared_store.evict(NODE_DEFINITIONS_TAG)
+    return True
 
 
 @server_mcp.tool(
@@ -451,6 +834,8 @@ async def create_empty_lab(lab: LabCreate | dict) -> UUID4Type:
         if isinstance(lab, dict):
             lab = LabCreate(**lab)
         resp = await cml_client.post("/labs", data=lab.model_dump(mode="json", exclude_none=True))
+        lab_changed(listing=True)
+        index_lab_title(resp["id"], resp.get("lab_title") or lab.title)
         return UUID4Type(resp["id"])
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
@@ -490,7 +875,10 @@ async def modify_cml_lab(lid: UUID4Type, lab: LabCreate | dict) -> bool:
         # representation of the argument object.
         if isinstance(lab, dict):
             lab = LabCreate(**lab)
-        await cml_client.patch(f"/labs/{lid}", data=lab.model_dump(mode="json", exclude_none=True))
+        await cml_client.patch(f"/labs/{lid}", data=lab.model_dump(mode="json", exclude_none=True), idempotent=True)
+        lab_changed(lid)
+        if lab.title:
+            index_lab_title(lid, lab.title)
         return True
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
@@ -533,6 +921,8 @@ async def create_full_lab_topology(topology: Topology | dict) -> UUID4Type:
         if isinstance(topology, dict):
             topology = Topology(**topology)
         resp = await cml_client.post("/import", data=topology.model_dump(mode="json", exclude_defaults=True, exclude_none=True))
+        lab_changed(listing=True)
+        index_lab_title(resp["id"], topology.lab.title)
         return UUID4Type(resp["id"])
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
@@ -541,21 +931,164 @@ async def create_full_lab_topology(topology: Topology | dict) -> UUID4Type:
         raise ToolError(e)
 
 
+@server_mcp.tool(
+    annotations={
+        "title": "Apply a Topology to an Existing CML Lab",
+        "readOnlyHint": False,
+        "destructiveHint": True,
+        "idempotentHint": True,
+    }
+)
+async def apply_cml_lab_topology(lid: UUID4Type, topology: Topology | dict) -> AppliedTopology:
+    """
+    Make an existing CML lab match a Topology object, changing only what differs, and report what changed.
+
+    The topology uses the same schema as create_full_lab_topology.  The lab is compared with it and:
+      - Lab title, description and notes are updated if they differ.
+      - Nodes (matched by label) that are not in the topology are stopped, wiped and deleted; new nodes are created;
+        nodes with changed attributes or configuration are updated in place; nodes whose node definition changed are recreated.
+        Configuration, image and resource changes to nodes that are not wiped are skipped and listed under skipped.
+      - Missing interfaces are added (matched by label, or by type and slot).
+      - Links (matched by the interfaces they connect) that are not in the topology are deleted; new links are created;
+        link conditioning is applied where it differs.
+      - Annotations (matched by content) are added or deleted.
+
+    Use this instead of deleting and recreating a lab to change it.  Applying the same topology again makes no changes.
+    """
+    try:
+        # XXX The dict usage is a workaround for some LLMs that pass a JSON string
+        # representation of the argument object.
+        if isinstance(topology, dict):
+            topology = Topology(**topology)
+        try:
+            result = await apply_topology(cml_client, lid, topology, settings.cml_max_concurrency, settings.cml_teardown_timeout)
+        finally:
+            # Even a failed apply may have changed the lab
+            lab_changed(lid)
+        if topology.lab.title:
+            index_lab_title(lid, topology.lab.title)
+        return result
+    except httpx.HTTPStatusError as e:
+        raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
+    except Exception as e:
+        logger.error(f"Error applying topology to lab {lid}: {str(e)}", exc_info=True)
+        raise ToolError(e)
+
+
+async def compile_spec(spec: str | dict) -> Topology:
+    """
+    Compile a topology spec, labelling and sizing interfaces from the node definitions it uses.
+
+    Args:
+        spec (str | dict): The spec, as YAML/JSON text or already parsed.
+
+    Returns:
+        Topology: The compiled topology.
+    """
+    if isinstance(spec, str):
+        spec = parse_topology_spec(spec)
+    dids = sorted(spec_node_definitions(spec))
+    interfaces = await asyncio.gather(*(get_node_def_interfaces(did) for did in dids))
+    return compile_topology(
+        spec,
+        {did: intfs.physical for did, intfs in zip(dids, interfaces) if intfs.physical},
+        {did: intfs.min_count or 0 for did, intfs in zip(dids, interfaces)},
+    )
+
+
+@server_mcp.tool(
+    annotations={
+        "title": "Create a CML Lab from a Topology Spec",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+    }
+)
+async def create_cml_lab_from_spec(spec: str | dict) -> UUID4Type:
+    """
+    Create a new CML lab from a compact topology spec (YAML or JSON text, or an object) in a single import, and return its ID.
+
+    The spec lists the lab details, nodes (label -> attributes, optionally sharing attributes through roles),
+    links as [node_a, node_b] pairs, IP plans and annotations; interfaces are allocated automatically and node
+    configurations are Jinja templates.  For example:
+
+        lab: {title: My lab}
+        roles:
+          router: {node_definition: iosv, configuration: "hostname {{ label }}\ninterface {{ ip.mgmt.interface }}\n ip address {{ ip.mgmt.address }} {{ ip.mgmt.netmask }}\n"}
+        nodes:
+          r1: {role: router, x: 0, y: 0}
+          r2: {role: router, x: 200, y: 0}
+          sw: {node_definition: iosvl2, x: 100, y: -100}
+        links: [[r1, r2], [r1, sw], [r2, sw]]
+        ip_plans:
+          mgmt: {network: 192.168.100.0/24, via: sw}
+
+    Templates can use label, interfaces, peers (peer label -> interface label), ip (plan -> address, netmask,
+    prefixlen, cidr, network, interface) and snippets (the spec's snippets mapping).
+    """
+    try:
+        topology = await compile_spec(spec)
+        resp = await cml_client.post("/import", data=topology.model_dump(mode="json", exclude_defaults=True, exclude_none=True))
+        lab_changed(listing=True)
+        index_lab_title(resp["id"], topology.lab.title)
+        return UUID4Type(resp["id"])
+    except httpx.HTTPStatusError as e:
+        raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
+    except Exception as e:
+        logger.error(f"Error creating lab from spec: {str(e)}", exc_info=True)
+        raise ToolError(e)
+
+
+@server_mcp.tool(
+    annotations={
+        "title": "Apply a Topology Spec to an Existing CML Lab",
+        "readOnlyHint": False,
+        "destructiveHint": True,
+        "idempotentHint": True,
+    }
+)
+async def apply_cml_lab_spec(lid: UUID4Type, spec: str | dict) -> AppliedTopology:
+    """
+    Make an existing CML lab match a topology spec (see create_cml_lab_from_spec), changing only what differs.
+
+    The spec is compiled and applied exactly as apply_cml_lab_topology applies a Topology object, so
+    re-applying an unchanged spec makes no changes.
+    """
+    try:
+        topology = await compile_spec(spec)
+        try:
+            result = await apply_topology(cml_client, lid, topology, settings.cml_max_concurrency, settings.cml_teardown_timeout)
+        finally:
+            # Even a failed apply may have changed the lab
+            lab_changed(lid)
+        if topology.lab.title:
+            index_lab_title(lid, topology.lab.title)
+        return result
+    except httpx.HTTPStatusError as e:
+        raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
+    except Exception as e:
+        logger.error(f"Error applying spec to lab {lid}: {str(e)}", exc_info=True)
+        raise ToolError(e)
+
+
 @server_mcp.tool(annotations={"title": "Start a CML Lab", "readOnlyHint": False, "destructiveHint": False, "idempotentHint": True})
-async def start_cml_lab(lid: UUID4Type, wait_for_convergence: bool = False) -> bool:
+async def start_cml_lab(
+    lid: UUID4Type, wait_for_convergence: bool = False, timeout: float = settings.cml_convergence_timeout
+) -> bool:
     """
     Start a CML lab by its ID.
 
     If wait_for_convergence is True, the tool will wait for the lab to reach a stable state before returning.
+    The wait gives up with an error after timeout seconds.
     """
+
+    async def converged() -> bool:
+        return bool(await cml_client.get(f"/labs/{lid}/check_if_converged"))
+
     try:
         await cml_client.put(f"/labs/{lid}/start")
+        lab_changed(lid)
         if wait_for_convergence:
-            while True:
-                converged = await cml_client.get(f"/labs/{lid}/check_if_converged")
-                if converged:
-                    break
-                await asyncio.sleep(3)
+            await convergence_waiter.wait(str(lid), converged, timeout)
         return True
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
@@ -572,6 +1105,7 @@ async def stop_lab(lid: UUID4Type) -> None:
         lid (UUID4Type): The lab ID.
     """
     await cml_client.put(f"/labs/{lid}/stop")
+    lab_changed(lid)
 
 
 async def wipe_lab(lid: UUID4Type) -> None:
@@ -582,6 +1116,7 @@ async def wipe_lab(lid: UUID4Type) -> None:
         lid (UUID4Type): The lab ID.
     """
     await cml_client.put(f"/labs/{lid}/wipe")
+    lab_changed(lid)
 
 
 @server_mcp.tool(annotations={"title": "Stop a CML Lab", "readOnlyHint": False, "destructiveHint": False, "idempotentHint": True})
@@ -639,9 +1174,12 @@ async def delete_cml_lab(lid: UUID4Type, ctx: Context) -> bool:
     wait for a response.
     """
     try:
-        await stop_lab(lid)  # Ensure the lab is stopped before deletion
-        await wipe_lab(lid)  # Ensure the lab is wiped before deletion
-        await cml_client.delete(f"/labs/{lid}")
+        # Stops and wipes the lab first if its state requires it
+        try:
+            await teardown_lab(cml_client, lid, settings.cml_teardown_timeout)
+        finally:
+            lab_changed(lid, listing=True)
+        forget_lab_title(lid)
         return True
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
@@ -650,6 +1188,46 @@ async def delete_cml_lab(lid: UUID4Type, ctx: Context) -> bool:
         raise ToolError(e)
 
 
+@server_mcp.tool(
+    annotations={
+        "title": "Delete Multiple CML Labs",
+        "readOnlyHint": False,
+        "destructiveHint": True,
+    }
+)
+async def delete_cml_labs(lids: list[UUID4Type], ctx: Context) -> list[TeardownResult]:
+    """
+    Delete many CML labs at once by their IDs and return a result for each lab.  Labs that are
+    running and/or not wiped are stopped and wiped first.  Labs are torn down concurrently, so
+    this is much faster than deleting them one at a time.
+
+    A failure deleting one lab does not stop the others; check each result's "deleted" and "error" fields.
+
+    Before running this tool make sure to ask the user if they're sure they want to delete these labs and
+    wait for a response.
+    """
+    done = 0
+
+    async def report(result: TeardownResult) -> None:
+        nonlocal done
+        done += 1
+        lab_changed(result.id, listing=True)
+        if result.deleted:
+            forget_lab_title(result.id)
+        await ctx.report_progress(done, len(lids))
+
+    try:
+        return await teardown_many(
+            lids,
+            lambda lid: teardown_lab(cml_client, lid, settings.cml_teardown_timeout),
+            settings.cml_max_concurrency,
+            on_result=report,
+        )
+    except Exception as e:
+        logger.error(f"Error deleting CML labs {lids}: {str(e)}", exc_info=True)
+        raise ToolError(e)
+
+
 async def add_interface(lid: UUID4Type, intf: InterfaceCreate) -> SimplifiedInterfaceResponse:
     """
     Add an interface to a CML lab by its lab ID.
@@ -662,6 +1240,7 @@ async def add_interface(lid: UUID4Type, intf: InterfaceCreate) -> SimplifiedInte
         InterfaceResponse: The added interface details.
     """
     resp = await cml_client.post(f"/labs/{lid}/interfaces", data=intf.model_dump(mode="json", exclude_none=True))
+    lab_changed(lid)
     return SimplifiedInterfaceResponse(**resp)
 
 
@@ -697,6 +1276,7 @@ async def add_node_to_cml_lab(lid: UUID4Type, node: NodeCreate | dict) -> UUID4T
         resp = await cml_client.post(
             f"/labs/{lid}/nodes", params={"populate_interfaces": True}, data=node.model_dump(mode="json", exclude_defaults=True)
         )
+        lab_changed(lid)
         return UUID4Type(resp["id"])
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
@@ -787,6 +1367,7 @@ async def add_annotation_to_cml_lab(
                     f"Invalid annotation type: {annotation['type']}. Must be one of 'text', 'rectangle', 'ellipse', or 'line'."
                 )
         resp = await cml_client.post(f"/labs/{lid}/annotations", data=annotation.model_dump(mode="json", exclude_defaults=True))
+        lab_changed(lid)
         return UUID4Type(resp["id"])
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
@@ -811,6 +1392,7 @@ async def delete_annotation_from_lab(lid: UUID4Type, annotation_id: UUID4Type, c
     """
     try:
         await cml_client.delete(f"/labs/{lid}/annotations/{annotation_id}")
+        lab_changed(lid)
         return True
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
@@ -856,13 +1438,18 @@ async def add_interface_to_node(lid: UUID4Type, intf: InterfaceCreate | dict) ->
         "readOnlyHint": True,
     }
 )
-async def get_interfaces_for_node(lid: UUID4Type, nid: UUID4Type) -> list[SimplifiedInterfaceResponse]:
+async def get_interfaces_for_node(
+    lid: UUID4Type, nid: UUID4Type, fields: list[str] | None = None
+) -> list[SimplifiedInterfaceResponse] | list[dict[str, Any]]:
     """
     Get a list of interfaces for a specific node in a CML lab by its lab ID and node ID.
+
+    If fields is given, only those attributes of each interface are returned (e.g., ["id", "label", "is_connected"]); this makes the
+    response smaller and faster.  Leave it empty to get every attribute.
     """
     try:
-        resp = await cml_client.get(f"/labs/{lid}/nodes/{nid}/interfaces", params={"data": True, "operational": False})
-        return [SimplifiedInterfaceResponse(**iface) for iface in resp]
+        resp = await read_cache.get(f"/labs/{lid}/nodes/{nid}/interfaces", params={"data": True, "operational": False})
+        return project_all(SimplifiedInterfaceResponse, resp, fields)
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
     except Exception as e:
@@ -895,6 +1482,7 @@ async def connect_two_nodes(lid: UUID4Type, link_info: LinkCreate | dict) -> UUI
         if isinstance(link_info, dict):
             link_info = LinkCreate(**link_info)
         resp = await cml_client.post(f"/labs/{lid}/links", data=link_info.model_dump(mode="json"))
+        lab_changed(lid)
         return UUID4Type(resp["id"])
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
@@ -903,19 +1491,68 @@ async def connect_two_nodes(lid: UUID4Type, link_info: LinkCreate | dict) -> UUI
         raise ToolError(e)
 
 
+@server_mcp.tool(
+    annotations={
+        "title": "Build Nodes and Links in a CML Lab",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+    }
+)
+async def build_cml_lab_topology(
+    lid: UUID4Type, nodes: list[NodeCreate | dict], links: list[LabelLinkCreate | dict] | None = None
+) -> BuiltTopology:
+    """
+    Add many nodes, and the links between them, to a CML lab in a single call and return the new IDs.
+
+    This is much faster than calling add_node_to_cml_lab, add_interface_to_node and connect_two_nodes
+    for each object: all nodes are created in parallel, interfaces are resolved in one pass, and all
+    links are created in parallel.
+
+    Each node must conform to the NodeCreate schema (see add_node_to_cml_lab), and node labels must be unique.
+    Nodes get the default number of interfaces for their node definition, plus any more that the links need.
+
+    Each link must conform to the LabelLinkCreate schema:
+        - node_a (str): Label of the first node.
+        - node_b (str): Label of the second node.
+        - Optional: interface_a, interface_b (str): Interface labels to use (e.g., "GigabitEthernet0/1").  If omitted,
+          the next free physical interface on the node is used.
+
+    Returns a map of node label to node ID, and the link IDs in the order the links were given.  If an error
+    occurs, objects created before it remain in the lab.
+    """
+    try:
+        # XXX The dict usage is a workaround for some LLMs that pass a JSON string
+        # representation of the argument object.
+        nodes = [NodeCreate(**node) if isinstance(node, dict) else node for node in nodes]
+        links = [LabelLinkCreate(**link) if isinstance(link, dict) else link for link in links or []]
+        try:
+            return await build_topology(cml_client, lid, nodes, links, settings.cml_max_concurrency)
+        finally:
+            # Even a failed build may have changed the lab
+            lab_changed(lid)
+    except httpx.HTTPStatusError as e:
+        raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
+    except Exception as e:
+        logger.error(f"Error building topology in lab {lid}: {str(e)}", exc_info=True)
+        raise ToolError(e)
+
+
 @server_mcp.tool(
     annotations={
         "title": "Get All Links for a CML Lab",
         "readOnlyHint": True,
     }
 )
-async def get_all_links_for_lab(lid: UUID4Type) -> list[Link]:
+async def get_all_links_for_lab(lid: UUID4Type, fields: list[str] | None = None) -> list[Link] | list[dict[str, Any]]:
     """
     Get all links for a CML lab by its ID.
+
+    If fields is given, only those attributes of each link are returned (e.g., ["id", "node_a", "node_b", "state"]); this makes the
+    response smaller and faster.  Leave it empty to get every attribute.
     """
     try:
-        resp = await cml_client.get(f"/labs/{lid}/links", params={"data": True})
-        return [Link(**link) for link in resp]
+        resp = await read_cache.get(f"/labs/{lid}/links", params={"data": True})
+        return project_all(Link, resp, fields)
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
     except Exception as e:
@@ -955,7 +1592,10 @@ async def apply_link_conditioning(lid: UUID4Type, link_id: UUID4Type, condition:
         # representation of the argument object.
         if isinstance(condition, dict):
             condition = LinkConditionConfiguration(**condition)
-        await cml_client.patch(f"/labs/{lid}/links/{link_id}/condition", data=condition.model_dump(mode="json", exclude_none=True))
+        await cml_client.patch(
+            f"/labs/{lid}/links/{link_id}/condition", data=condition.model_dump(mode="json", exclude_none=True), idempotent=True
+        )
+        lab_changed(lid)
         return True
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
@@ -978,7 +1618,8 @@ async def configure_cml_node(lid: UUID4Type, nid: UUID4Type, config: NodeConfigu
     """
     payload = {"configuration": str(config)}
     try:
-        await cml_client.patch(f"/labs/{lid}/nodes/{nid}", data=payload)
+        await cml_client.patch(f"/labs/{lid}/nodes/{nid}", data=payload, idempotent=True)
+        lab_changed(lid)
         return True
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
@@ -988,24 +1629,22 @@ async def configure_cml_node(lid: UUID4Type, nid: UUID4Type, config: NodeConfigu
 
 
 @server_mcp.tool(annotations={"title": "Get Nodes for a CML Lab", "readOnlyHint": True})
-async def get_nodes_for_cml_lab(lid: UUID4Type) -> list[Node]:
+async def get_nodes_for_cml_lab(lid: UUID4Type, fields: list[str] | None = None) -> list[Node] | list[dict[str, Any]]:
     """
     Get a list of nodes for a CML lab by its ID.
+
+    If fields is given, only those attributes of each node are returned (e.g., ["id", "label", "state", "node_definition"]); this makes the
+    response smaller and faster.  Leave it empty to get every attribute.
     """
     try:
-        resp = await cml_client.get(f"/labs/{lid}/nodes", params={"data": True, "operational": True, "exclude_configurations": True})
-        rnodes = []
-        for node in list(resp):
-            # XXX: Fixup known issues with bad data coming from
-            # certain node types.
-            if node["operational"].get("vnc_key") == "":
-                node["operational"]["vnc_key"] = None
-            if node["operational"].get("image_definition") == "":
-                node["operational"]["image_definition"] = None
-            if node["operational"].get("serial_consoles") is None:
-                node["operational"]["serial_consoles"] = []
-            rnodes.append(Node(**node))
-        return rnodes
+        params = {
+            "data": True,
+            # Only ask the controller for the expensive parts of a node if they are wanted
+            "operational": not fields or "operational" in fields,
+            "exclude_configurations": not fields or "configuration" not in fields,
+        }
+        resp = await read_cache.get(f"/labs/{lid}/nodes", params=params)
+        return project_all(Node, [fixup_node(node) for node in resp], fields)
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
     except Exception as e:
@@ -1013,18 +1652,91 @@ async def get_nodes_for_cml_lab(lid: UUID4Type) -> list[Node]:
         raise ToolError(e)
 
 
+def fixup_node(node: dict[str, Any]) -> dict[str, Any]:
+    """
+    Fix up known issues with bad operational data coming from certain node types.
+
+    Args:
+        node (dict[str, Any]): A raw node object as returned by the CML API.  It is modified in place.
+
+    Returns:
+        dict[str, Any]: The same node object.
+    """
+    operational = node.get("operational")
+    if operational:
+        if operational.get("vnc_key") == "":
+            operational["vnc_key"] = None
+        if operational.get("image_definition") == "":
+            operational["image_definition"] = None
+        if operational.get("serial_consoles") is None:
+            operational["serial_consoles"] = []
+    return node
+
+
+@server_mcp.tool(annotations={"title": "Get a Page of Nodes for a CML Lab", "readOnlyHint": True})
+async def get_nodes_for_cml_lab_page(
+    lid: UUID4Type,
+    offset: int = 0,
+    limit: int = 50,
+    fields: list[str] | None = None,
+    states: list[NodeStates] | None = None,
+    tags: list[Tag] | None = None,
+) -> NodePage:
+    """
+    Get one page of the nodes in a CML lab by its ID.  Prefer this over getting all nodes for large labs.
+
+    - offset/limit select the page (limit 1-500).  Pass the returned next_offset as the offset to get the
+      next page; next_offset is null on the last page.
+    - fields limits each node to the named Node attributes (e.g., ["id", "label", "state", "node_definition"]).
+      Leave it empty to get every attribute.
+    - states keeps only nodes in one of the given states (e.g., ["BOOTED"]).
+    - tags keeps only nodes that carry at least one of the given tags.
+
+    The returned total is the number of nodes matching the filters across all pages.
+    """
+    try:
+        if offset < 0 or not 1 <= limit <= 500:
+            raise ValueError("offset must be 0 or more and limit must be between 1 and 500.")
+        params = {
+            "data": True,
+            "operational": not fields or "operational" in fields,
+            "exclude_configurations": not fields or "configuration" not in fields,
+        }
+        # One bulk read (shared with get_nodes_for_cml_lab through the cache), filtered and sliced here
+        nodes = await read_cache.get(f"/labs/{lid}/nodes", params=params)
+        if tags:
+            wanted = set(tags)
+            nodes = [node for node in nodes if wanted.intersection(node.get("tags") or [])]
+        if states:
+            wanted_states = {str(state) for state in states}
+            nodes = [node for node in nodes if node.get("state") in wanted_states]
+
+        page = []
+        for node in nodes[offset : offset + limit]:
+            node = fixup_node(node)
+            # Configurations can be huge; never return one that was not asked for
+            if params["exclude_configurations"]:
+                node.pop("configuration", None)
+            page.append(project(Node, node, fields))
+        next_offset = offset + limit if offset + limit < len(nodes) else None
+        return NodePage(nodes=page, total=len(nodes), next_offset=next_offset)
+    except httpx.HTTPStatusError as e:
+        raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
+    except Exception as e:
+        logger.error(f"Error getting a page of nodes for CML lab {lid}: {str(e)}", exc_info=True)
+        raise ToolError(e)
+
+
 @server_mcp.tool(annotations={"title": "Get a CML Lab by Title", "readOnlyHint": True})
 async def get_cml_lab_by_title(title: LabTitle) -> Lab:
     """
     Get a CML lab by its title.
     """
     try:
-        labs = await get_all_labs()
-        for lid in labs:
-            lab = await cml_client.get(f"/labs/{lid}")
-            if lab["lab_title"] == str(title):
-                return Lab(**lab)
-        raise ValueError(f"Lab with title '{title}' not found.")
+        lab = await find_lab_by_title(str(title))
+        if lab is None:
+            raise ValueError(f"Lab with title '{title}' not found.")
+        return Lab(**lab)
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
     except Exception as e:
@@ -1041,6 +1753,7 @@ async def stop_node(lid: UUID4Type, nid: UUID4Type) -> None:
         nid (UUID4Type): The node ID.
     """
     await cml_client.put(f"/labs/{lid}/nodes/{nid}/stop")
+    lab_changed(lid)
 
 
 async def wipe_node(lid: UUID4Type, nid: UUID4Type) -> None:
@@ -1052,6 +1765,7 @@ async def wipe_node(lid: UUID4Type, nid: UUID4Type) -> None:
         nid (UUID4Type): The node ID.
     """
     await cml_client.put(f"/labs/{lid}/nodes/{nid}/wipe_disks")
+    lab_changed(lid)
 
 
 @server_mcp.tool(annotations={"title": "Stop a CML Node", "readOnlyHint": False, "destructiveHint": False, "idempotentHint": True})
@@ -1070,20 +1784,24 @@ async def stop_cml_node(lid: UUID4Type, nid: UUID4Type) -> bool:
 
 
 @server_mcp.tool(annotations={"title": "Start a CML Node", "readOnlyHint": False, "destructiveHint": False, "idempotentHint": True})
-async def start_cml_node(lid: UUID4Type, nid: UUID4Type, wait_for_convergence: bool = False) -> bool:
+async def start_cml_node(
+    lid: UUID4Type, nid: UUID4Type, wait_for_convergence: bool = False, timeout: float = settings.cml_convergence_timeout
+) -> bool:
     """
     Start a node in a CML lab by its lab ID and node ID.
 
     If wait_for_convergence is True, the tool will wait for the node to reach a stable state before returning.
+    The wait gives up with an error after timeout seconds.
     """
+
+    async def converged() -> bool:
+        return bool(await cml_client.get(f"/labs/{lid}/nodes/{nid}/check_if_converged"))
+
     try:
         await cml_client.put(f"/labs/{lid}/nodes/{nid}/state/start")
+        lab_changed(lid)
         if wait_for_convergence:
-            while True:
-                converged = await cml_client.get(f"/labs/{lid}/nodes/{nid}/check_if_converged")
-                if converged:
-                    break
-                await asyncio.sleep(3)
+            await convergence_waiter.wait(str(lid), converged, timeout)
         return True
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
@@ -1121,9 +1839,12 @@ async def delete_cml_node(lid: UUID4Type, nid: UUID4Type, ctx: Context) -> bool:
     want to delete the node and wait for a response.  Deleting a node will remove all of its data.
     """
     try:
-        await stop_node(lid, nid)  # Ensure the node is stopped before deletion
-        await wipe_node(lid, nid)
-        await cml_client.delete(f"/labs/{lid}/nodes/{nid}")
+        # Stops and wipes the node first if its state requires it
+        try:
+            await teardown_node(cml_client, lid, nid, settings.cml_teardown_timeout)
+        finally:
+            lab_changed(lid)
+        return True
     except httpx.HTTPStatusError as e:
         raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
     except Exception as e:
@@ -1131,6 +1852,96 @@ async def delete_cml_node(lid: UUID4Type, nid: UUID4Type, ctx: Context) -> bool:
         raise ToolError(e)
 
 
+@server_mcp.tool(annotations={"title": "Delete multiple nodes from a CML lab.", "readOnlyHint": False, "destructiveHint": True})
+async def delete_cml_nodes(lid: UUID4Type, nids: list[UUID4Type], ctx: Context) -> list[TeardownResult]:
+    """
+    Delete many nodes from a CML lab at once by their lab ID and node IDs and return a result for each node.
+    Nodes that are running or not wiped are stopped and wiped first.  Nodes are torn down concurrently.
+
+    A failure deleting one node does not stop the others; check each result's "deleted" and "error" fields.
+
+    Before running this tool, make sure to ask the user if they really
+    want to delete the nodes and wait for a response.  Deleting a node will remove all of its data.
+    """
+    done = 0
+
+    async def report(result: TeardownResult) -> None:
+        nonlocal done
+        done += 1
+        lab_changed(lid)
+        await ctx.report_progress(done, len(nids))
+
+    try:
+        return await teardown_many(
+            nids,
+            lambda nid: teardown_node(cml_client, lid, nid, settings.cml_teardown_timeout),
+            settings.cml_max_concurrency,
+            on_result=report,
+        )
+    except Exception as e:
+        logger.error(f"Error deleting CML nodes {nids} in lab {lid}: {str(e)}", exc_info=True)
+        raise ToolError(e)
+
+
+# Node attributes the pyATS testbed is built from
+TESTBED_NODE_FIELDS = ("id", "label", "node_definition", "image_definition")
+
+
+async def lab_fingerprint(lid: UUID4Type) -> str:
+    """
+    Get a cheap fingerprint of a lab's topology, used to tell when a cached pyATS testbed is stale.
+
+    Args:
+        lid (UUID4Type): The lab ID.
+
+    Returns:
+        str: A value that changes when anything the testbed is built from changes: nodes being
+            added, removed or relabelled, their node or image definitions, or the links between them.
+    """
+    nodes, links = await asyncio.gather(
+        read_cache.get(f"/labs/{lid}/nodes", params={"data": True, "operational": False, "exclude_configurations": True}),
+        read_cache.get(f"/labs/{lid}/links", params={"data": True}),
+    )
+    topology = {
+        "nodes": sorted([node.get(name) for name in TESTBED_NODE_FIELDS] for node in nodes),
+        "links": sorted(sorted((link["interface_a"], link["interface_b"])) for link in links),
+    }
+    return hashlib.sha256(json.dumps(topology, default=str).encode()).hexdigest()
+
+
+# Longest a CLI worker waits for a lab's pyATS testbed, so a hung fetch cannot take a worker for good
+TESTBED_FETCH_TIMEOUT = 60.0  # seconds
+
+
+async def run_cli(lid: UUID4Type, label: NodeLabel, commands: str, config_command: bool, fingerprint: str) -> str:
+    """
+    Run CLI commands on a node through the pooled pyATS sessions.
+
+    Args:
+        lid (UUID4Type): The lab ID.
+        label (NodeLabel): The node label.
+        commands (str): The commands to send, separated by newlines.
+        config_command (bool): Whether the commands are configuration commands.
+        fingerprint (str): The lab's current topology fingerprint (see lab_fingerprint()).
+
+    Returns:
+        str: The command output.
+    """
+    loop = asyncio.get_running_loop()
+
+    def fetch_testbed() -> str:
+        # Only called (from a CLI worker thread) when the pooled testbed is missing or stale; the
+        # request itself runs on the event loop, which is not blocked while the worker waits for it
+        future = asyncio.run_coroutine_threadsafe(cml_client.get_pyats_testbed(str(lid)), loop)
+        try:
+            return future.result(timeout=TESTBED_FETCH_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Timed out fetching the pyATS testbed for lab {lid}")
+
+    return await cli_pool.run(str(lid), str(label), commands, config_command, fingerprint, fetch_testbed)
+
+
 @server_mcp.tool(annotations={"title": "Send CLI Command to CML Node", "readOnlyHint": False, "destructiveHint": True})
 async def send_cli_command(lid: UUID4Type, label: NodeLabel, commands: str, config_command: bool = False) -> str:
     """
@@ -1143,27 +1954,87 @@ async def send_cli_command(lid: UUID4Type, label: NodeLabel, commands: str, conf
     mode (e.g., "configure terminal" or "end"). When config_command is False, only operational/exec commands should be sent;
     configuration commands are not allowed.
     """
-    cwd = os.getcwd()  # Save the current working directory
     try:
-        os.chdir(tempfile.gettempdir())  # Change to a writable directory (required by pyATS/ClPyats)
-        lab = cml_client.vclient.join_existing_lab(str(lid))  # Join the existing lab using the provided lab ID
-        try:
-            pylab = ClPyats(lab)  # Create a ClPyats object for interacting with the lab
-            pylab.sync_testbed(settings.cml_username, settings.cml_password)  # Sync the testbed with CML credentials
-        except PyatsNotInstalled:
-            raise ImportError(
-                "PyATS and Genie are required to send commands to running devices.  See the documentation on how to install them."
-            )
-        if config_command:
-            # Send the command as a configuration command
-            return pylab.run_config_command(str(label), commands)
-        # Send the command as an exec/operational command
-        return pylab.run_command(str(label), commands)
+        fingerprint = await lab_fingerprint(lid)
+        return await run_cli(lid, label, commands, config_command, fingerprint)
     except Exception as e:
         logger.error(f"Error sending CLI command '{commands}' to node {label} in lab {lid}: {str(e)}", exc_info=True)
         raise ToolError(e)
-    finally:
-        os.chdir(cwd)  # Restore the original working directory
+
+
+async def select_nodes_by_tag(lid: UUID4Type, tags: list[Tag]) -> list[str]:
+    """
+    Get the labels of the nodes in a lab that carry any of the given tags.
+
+    Args:
+        lid (UUID4Type): The lab ID.
+        tags (list[Tag]): The tags to match.
+
+    Returns:
+        list[str]: The matching node labels.
+    """
+    nodes = await read_cache.get(
+        f"/labs/{lid}/nodes", params={"data": True, "operational": False, "exclude_configurations": True}
+    )
+    wanted = set(tags)
+    return [node["label"] for node in nodes if wanted.intersection(node.get("tags") or [])]
+
+
+@server_mcp.tool(annotations={"title": "Send CLI Command to Multiple CML Nodes", "readOnlyHint": False, "destructiveHint": True})
+async def send_cli_command_to_nodes(
+    lid: UUID4Type,
+    commands: str,
+    ctx: Context,
+    labels: list[NodeLabel] | None = None,
+    tags: list[Tag] | None = None,
+    config_command: bool = False,
+) -> list[CliResult]:
+    """
+    Send the same CLI command(s) to many nodes in a CML lab at once and return each node's output.
+    Nodes are selected by label, by tag (any node carrying one of the tags), or both.  Nodes must be
+    started and ready (i.e., in a BOOTED state) for this to succeed.
+
+    The commands run on all selected nodes concurrently, and each node's output is also streamed back
+    as a log message as soon as that node finishes.  A failure on one node does not stop the others;
+    check each result's "output" and "error" fields.
+
+    Multiple commands can be sent separated by newlines.  The same rules for config_command apply as for
+    sending a CLI command to a single node.
+    """
+    try:
+        selected = list(dict.fromkeys(str(label) for label in labels or []))
+        if tags:
+            selected.extend(label for label in await select_nodes_by_tag(lid, tags) if label not in selected)
+        if not selected:
+            raise ValueError("No nodes selected; provide node labels and/or tags that match nodes in the lab.")
+        fingerprint = await lab_fingerprint(lid)
+    except httpx.HTTPStatusError as e:
+        raise ToolError(f"HTTP error {e.response.status_code}: {e.response.text}")
+    except Exception as e:
+        logger.error(f"Error selecting nodes in lab {lid}: {str(e)}", exc_info=True)
+        raise ToolError(e)
+
+    # Stay within the CLI worker pool's capacity rather than overflowing its queue
+    sem = asyncio.Semaphore(settings.cli_workers)
+
+    async def run_one(label: str) -> CliResult:
+        async with sem:
+            try:
+                return CliResult(label=label, output=await run_cli(lid, label, commands, config_command, fingerprint))
+            except Exception as e:
+                logger.error(f"Error sending CLI command '{commands}' to node {label} in lab {lid}: {str(e)}", exc_info=True)
+                return CliResult(label=label, error=str(e) or type(e).__name__)
+
+    results: dict[str, CliResult] = {}
+    for fut in asyncio.as_completed([run_one(label) for label in selected]):
+        result = await fut
+        results[result.label] = result
+        if result.error is None:
+            await ctx.info(f"[{result.label}]\n{result.output}")
+        else:
+            await ctx.warning(f"[{result.label}] failed: {result.error}")
+        await ctx.report_progress(len(results), len(selected))
+    return [results[label] for label in selected]
 
 
 
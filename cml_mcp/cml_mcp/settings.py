@@ -22,6 +22,9 @@
 # OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
 # SUCH DAMAGE.
 
+import os
+import tempfile
+
 from pydantic import AnyHttpUrl, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -41,5 +44,53 @@ class Settings(BaseSettings):
     cml_password: str = Field(..., validation_alias="VIRL_PASSWORD")
     cml_verify_cert: bool = Field(True, validation_alias="CML_VERIFY_CERT")
 
+    # Where the MCP HTTP transport listens, and how many worker processes serve it
+    server_host: str = Field("127.0.0.1", validation_alias="MCP_HOST")
+    server_port: int = Field(8000, ge=1, le=65535, validation_alias="MCP_PORT")
+    server_workers: int = Field(1, ge=1, validation_alias="MCP_WORKERS")
+    # Seconds in-flight requests are given to finish on shutdown
+    server_shutdown_timeout: float = Field(30.0, ge=0, validation_alias="MCP_SHUTDOWN_TIMEOUT")
+    # Directory of the on-disk store that worker processes use to share the CML token and node definitions
+    shared_store_dir: str = Field(
+        os.path.join(tempfile.gettempdir(), "cml-mcp-shared"), validation_alias="MCP_SHARED_STORE_DIR"
+    )
+
+    # Upper bound on concurrent controller requests issued by a single tool call
+    cml_max_concurrency: int = Field(16, ge=1, validation_alias="CML_MAX_CONCURRENCY")
+    # Seconds allowed for a single lab or node stop -> wipe -> delete pipeline
+    cml_teardown_timeout: float = Field(300.0, gt=0, validation_alias="CML_TEARDOWN_TIMEOUT")
+    # Default seconds to wait for a lab or node to converge after starting it
+    cml_convergence_timeout: float = Field(900.0, gt=0, validation_alias="CML_CONVERGENCE_TIMEOUT")
+    # Path of the controller's event websocket, relative to the controller URL
+    cml_events_path: str = Field("/ws/pop", validation_alias="CML_EVENTS_PATH")
+    # Node definitions rarely change; cache them for this many seconds
+    node_def_cache_ttl: float = Field(3600.0, gt=0, validation_alias="NODE_DEF_CACHE_TTL")
+    node_def_cache_size: int = Field(256, ge=1, validation_alias="NODE_DEF_CACHE_SIZE")
+    # Entries in the read cache of labs, nodes, links, users, etc. (least recently used are evicted first)
+    read_cache_size: int = Field(1024, ge=1, validation_alias="READ_CACHE_SIZE")
+
+    # Seconds a pooled pyATS console connection may sit idle before it is closed
+    cli_session_idle_ttl: float = Field(600.0, gt=0, validation_alias="CLI_SESSION_IDLE_TTL")
+    # Worker threads that run CLI commands, and how many more commands may queue behind them
+    cli_workers: int = Field(8, ge=1, validation_alias="CLI_WORKERS")
+    cli_queue_size: int = Field(32, ge=0, validation_alias="CLI_QUEUE_SIZE")
+
+    # HTTP transport used for the CML API
+    cml_pool_max_connections: int = Field(100, ge=1, validation_alias="CML_POOL_MAX_CONNECTIONS")
+    cml_pool_max_keepalive: int = Field(20, ge=0, validation_alias="CML_POOL_MAX_KEEPALIVE")
+    cml_keepalive_expiry: float = Field(30.0, ge=0, validation_alias="CML_KEEPALIVE_EXPIRY")
+    cml_http2: bool = Field(False, validation_alias="CML_HTTP2")
+    cml_connect_timeout: float = Field(10.0, gt=0, validation_alias="CML_CONNECT_TIMEOUT")
+    cml_read_timeout: float = Field(10.0, gt=0, validation_alias="CML_READ_TIMEOUT")
+    cml_write_timeout: float = Field(10.0, gt=0, validation_alias="CML_WRITE_TIMEOUT")
+    cml_pool_timeout: float = Field(10.0, gt=0, validation_alias="CML_POOL_TIMEOUT")
+    # Attempts (including the first) for requests that fail transiently, and the backoff between them
+    cml_retry_attempts: int = Field(3, ge=1, validation_alias="CML_RETRY_ATTEMPTS")
+    cml_retry_base_delay: float = Field(0.5, ge=0, validation_alias="CML_RETRY_BASE_DELAY")
+    cml_retry_max_delay: float = Field(10.0, ge=0, validation_alias="CML_RETRY_MAX_DELAY")
+    # Consecutive failures that mark the controller as down, and seconds before probing it again
+    cml_breaker_threshold: int = Field(5, ge=1, validation_alias="CML_BREAKER_THRESHOLD")
+    cml_breaker_reset: float = Field(30.0, gt=0, validation_alias="CML_BREAKER_RESET")
+
 
 settings = Settings()
\ No newline at end of file
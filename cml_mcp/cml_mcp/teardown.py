@@ -0,0 +1,145 @@
+# Copyright (c) 2025  Cisco Systems, Inc.
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+import httpx
+
+from .cml_client import CMLClient
+from .polling import poll_until
+from .schemas.common import States, UUID4Type
+from .types import TeardownResult
+
+logger = logging.getLogger("cml-mcp")
+
+# States from which a lab or node can be wiped, and the state it reaches once wiped
+STOPPED_STATES = {States.STOPPED.value, States.DEFINED_ON_CORE.value}
+WIPED_STATE = States.DEFINED_ON_CORE.value
+
+
+async def _stop_and_wipe(
+    get_state: Callable[[], Awaitable[str]],
+    stop: Callable[[], Awaitable[None]],
+    wipe: Callable[[], Awaitable[None]],
+    deadline: float,
+) -> None:
+    """
+    Drive an element to DEFINED_ON_CORE, skipping the steps it does not need.
+    """
+    state = await get_state()
+    if state not in STOPPED_STATES:
+        await stop()
+        state = await poll_until(get_state, lambda s: s in STOPPED_STATES, deadline)
+    if state != WIPED_STATE:
+        await wipe()
+        await poll_until(get_state, lambda s: s == WIPED_STATE, deadline)
+
+
+async def teardown_lab(client: CMLClient, lid: UUID4Type, timeout: float) -> None:
+    """
+    Stop, wipe and delete a lab, waiting on the lab's state between steps.
+
+    Args:
+        client (CMLClient): The CML API client.
+        lid (UUID4Type): The lab ID.
+        timeout (float): Seconds to allow for the whole pipeline.
+    """
+
+    async def get_state() -> str:
+        return await client.get(f"/labs/{lid}/state")
+
+    async def stop() -> None:
+        await client.put(f"/labs/{lid}/stop")
+
+    async def wipe() -> None:
+        await client.put(f"/labs/{lid}/wipe")
+
+    await _stop_and_wipe(get_state, stop, wipe, time.monotonic() + timeout)
+    await client.delete(f"/labs/{lid}")
+
+
+async def teardown_node(client: CMLClient, lid: UUID4Type, nid: UUID4Type, timeout: float) -> None:
+    """
+    Stop, wipe and delete a node, waiting on the node's state between steps.
+
+    Args:
+        client (CMLClient): The CML API client.
+        lid (UUID4Type): The lab ID.
+        nid (UUID4Type): The node ID.
+        timeout (float): Seconds to allow for the whole pipeline.
+    """
+
+    async def get_state() -> str:
+        return (await client.get(f"/labs/{lid}/nodes/{nid}/state"))["state"]
+
+    async def stop() -> None:
+        await client.put(f"/labs/{lid}/nodes/{nid}/state/stop")
+
+    async def wipe() -> None:
+        await client.put(f"/labs/{lid}/nodes/{nid}/wipe_disks")
+
+    await _stop_and_wipe(get_state, stop, wipe, time.monotonic() + timeout)
+    await client.delete(f"/labs/{lid}/nodes/{nid}")
+
+
+async def teardown_many(
+    ids: list[UUID4Type],
+    teardown: Callable[[UUID4Type], Awaitable[None]],
+    concurrency: int,
+    on_result: Callable[[TeardownResult], Awaitable[None]] | None = None,
+) -> list[TeardownResult]:
+    """
+    Run teardown pipelines for many elements concurrently and report per-element results.
+
+    A failure tearing down one element does not stop the others.
+
+    Args:
+        ids (list[UUID4Type]): The lab or node IDs to tear down.
+        teardown (Callable[[UUID4Type], Awaitable[None]]): Tears down a single element.
+        concurrency (int): The maximum number of pipelines running at once.
+        on_result (Callable[[TeardownResult], Awaitable[None]], optional): Called as each pipeline finishes.
+
+    Returns:
+        list[TeardownResult]: One result per ID, in the order given.
+    """
+    sem = asyncio.Semaphore(concurrency)
+
+    async def run(eid: UUID4Type) -> TeardownResult:
+        async with sem:
+            try:
+                await teardown(eid)
+                result = TeardownResult(id=eid, deleted=True)
+            except httpx.HTTPStatusError as e:
+                result = TeardownResult(id=eid, deleted=False, error=f"HTTP error {e.response.status_code}: {e.response.text}")
+            except Exception as e:
+                logger.error(f"Error tearing down {eid}: {str(e)}", exc_info=True)
+                result = TeardownResult(id=eid, deleted=False, error=str(e) or type(e).__name__)
+        if on_result is not None:
+            await on_result(result)
+        return result
+
+    return list(await asyncio.gather(*(run(eid) for eid in ids)))
@@ -0,0 +1,319 @@
+# Copyright (c) 2025  Cisco Systems, Inc.
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+
+import asyncio
+import logging
+from collections.abc import Awaitable
+from typing import Any
+
+from .cml_client import CMLClient
+from .schemas.common import UUID4Type
+from .schemas.links import LinkConditionConfiguration
+from .schemas.topologies import InterfaceTopology, LinkTopology, NodeTopology, Topology
+from .teardown import WIPED_STATE, teardown_node
+from .topology_builder import bounded, get_lab_interfaces
+from .types import AppliedTopology
+
+logger = logging.getLogger("cml-mcp")
+
+# Node attributes that can be changed in place; anything else (i.e., the node definition)
+# requires the node to be replaced.
+NODE_UPDATE_FIELDS = (
+    "x",
+    "y",
+    "parameters",
+    "image_definition",
+    "ram",
+    "cpu_limit",
+    "data_volume",
+    "boot_disk_size",
+    "hide_links",
+    "tags",
+    "cpus",
+    "configuration",
+)
+# Node attributes the controller only accepts while the node is wiped (DEFINED_ON_CORE)
+NODE_BOOT_FIELDS = {"image_definition", "ram", "cpu_limit", "data_volume", "boot_disk_size", "cpus", "configuration"}
+LAB_UPDATE_FIELDS = ("title", "description", "notes")
+
+
+def _config_text(configuration: Any) -> Any:
+    """
+    Reduce a node configuration to the content of its main file, so the different
+    forms the API accepts compare equal.
+    """
+    if isinstance(configuration, list):
+        configuration = configuration[0] if configuration else None
+    if isinstance(configuration, dict):
+        return configuration.get("content")
+    return configuration
+
+
+def _node_changes(desired: NodeTopology, live: dict[str, Any]) -> dict[str, Any]:
+    """
+    Return the updatable attributes of a node that differ from the live node.
+
+    Attributes the desired node does not set are left alone.
+    """
+    wanted = desired.model_dump(mode="json", include=set(NODE_UPDATE_FIELDS), exclude_none=True)
+    changes = {}
+    for name, value in wanted.items():
+        current = live.get(name)
+        if name == "configuration":
+            same = _config_text(value) == _config_text(current)
+        elif name == "tags":
+            same = sorted(value) == sorted(current or [])
+        else:
+            same = value == current
+        if not same:
+            changes[name] = value
+    return changes
+
+
+def _normalise(value: Any) -> Any:
+    # The controller returns coordinates as floats while specs usually give ints
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def _annotation_key(annotation: dict[str, Any], names: set[str]) -> tuple:
+    return tuple(sorted((name, repr(_normalise(annotation.get(name)))) for name in names))
+
+
+def _link_conditioning(link: LinkTopology) -> dict[str, Any]:
+    """
+    Return the conditioning attributes a topology link sets, or an empty dict if it sets none.
+    """
+    if "conditioning" not in link.model_fields_set:
+        return {}
+    conditioning = LinkConditionConfiguration.model_validate(link.conditioning)
+    return conditioning.model_dump(mode="json", exclude_unset=True, exclude_none=True)
+
+
+def _resolve_interface(desired: InterfaceTopology, live: list[dict[str, Any]]) -> dict[str, Any] | None:
+    # Match by label when one is given, otherwise by type and slot
+    for intf in live:
+        if desired.label is not None and intf.get("label") == desired.label:
+            return intf
+    for intf in live:
+        if desired.label is None and intf.get("type") == desired.type and intf.get("slot") == desired.slot:
+            return intf
+    return None
+
+
+async def apply_topology(client: CMLClient, lid: UUID4Type, topology: Topology, concurrency: int, timeout: float) -> AppliedTopology:
+    """
+    Bring an existing lab in line with a topology, making only the changes needed.
+
+    Nodes are matched by label, interfaces by label (or type and slot), links by the
+    interfaces they connect, and annotations by content.  The lab is changed in three
+    rounds, each running its calls concurrently:
+
+      1. Update the lab details, changed nodes and annotations; delete removed links,
+         nodes and annotations; create new nodes and annotations.
+      2. Add any physical interfaces the topology needs that the nodes do not have.
+      3. Create new links and apply link conditioning.
+
+    Nodes whose node definition changed are torn down and recreated.  Boot-time
+    attributes (configuration, image, resources) of nodes that are not wiped are left
+    alone and reported as skipped, so the rest of the lab is still updated.  Surplus
+    interfaces and smart annotations are left alone.  Re-applying an unchanged
+    topology only reads the lab.  Nothing is rolled back on failure; re-applying
+    picks up where the failed run stopped.
+
+    Args:
+        client (CMLClient): The CML API client.
+        lid (UUID4Type): The lab ID.
+        topology (Topology): The desired topology.
+        concurrency (int): The maximum number of requests in flight at once.
+        timeout (float): Seconds to allow for tearing down each removed node.
+
+    Returns:
+        AppliedTopology: The node IDs by label and what was created, updated, deleted and skipped.
+    """
+    labels = [str(node.label) for node in topology.nodes]
+    duplicates = sorted({label for label in labels if labels.count(label) > 1})
+    if duplicates:
+        raise ValueError(f"Node labels must be unique; duplicated: {', '.join(duplicates)}.")
+
+    lab, live_nodes, live_interfaces, live_links, live_annotations = await asyncio.gather(
+        client.get(f"/labs/{lid}"),
+        client.get(f"/labs/{lid}/nodes", params={"data": True, "operational": False, "exclude_configurations": False}),
+        get_lab_interfaces(client, lid),
+        client.get(f"/labs/{lid}/links", params={"data": True}),
+        client.get(f"/labs/{lid}/annotations"),
+    )
+    sem = asyncio.Semaphore(concurrency)
+    result = AppliedTopology(nodes={})
+    tasks: list[Awaitable[Any]] = []
+
+    # Lab details
+    wanted_lab = topology.lab.model_dump(mode="json", include=set(LAB_UPDATE_FIELDS), exclude_none=True)
+    # The lab API returns these attributes with a "lab_" prefix
+    lab_changes = {name: value for name, value in wanted_lab.items() if lab.get(f"lab_{name}") != value}
+    if lab_changes:
+        tasks.append(client.patch(f"/labs/{lid}", data=lab_changes, idempotent=True))
+        result.updated.append("lab")
+
+    # Nodes
+    live_by_label = {node["label"]: node for node in live_nodes}
+    desired_by_label = {str(node.label): node for node in topology.nodes}
+    kept: dict[str, str] = {}
+    created: dict[str, NodeTopology] = {}
+
+    async def create_node(node: NodeTopology) -> None:
+        data = node.model_dump(mode="json", exclude={"id", "interfaces"}, exclude_defaults=True, exclude_none=True)
+        resp = await client.post(f"/labs/{lid}/nodes", params={"populate_interfaces": True}, data=data)
+        result.nodes[str(node.label)] = UUID4Type(resp["id"])
+
+    async def replace_node(node: NodeTopology, nid: str) -> None:
+        await teardown_node(client, lid, nid, timeout)
+        await create_node(node)
+
+    for label, live in live_by_label.items():
+        if label not in desired_by_label:
+            tasks.append(teardown_node(client, lid, live["id"], timeout))
+            result.deleted.append(f"node {label}")
+    for label, node in desired_by_label.items():
+        live = live_by_label.get(label)
+        if live is None:
+            tasks.append(create_node(node))
+            created[label] = node
+            result.created.append(f"node {label}")
+        elif live.get("node_definition") != node.node_definition:
+            tasks.append(replace_node(node, live["id"]))
+            created[label] = node
+            result.deleted.append(f"node {label}")
+            result.created.append(f"node {label}")
+        else:
+            kept[label] = live["id"]
+            result.nodes[label] = UUID4Type(live["id"])
+            changes = _node_changes(node, live)
+            held = sorted(name for name in changes if name in NODE_BOOT_FIELDS)
+            if held and live.get("state", WIPED_STATE) != WIPED_STATE:
+                for name in held:
+                    del changes[name]
+                result.skipped.append(f"node {label} ({', '.join(held)}): node is {live['state']}; wipe it to change these")
+            if changes:
+                tasks.append(client.patch(f"/labs/{lid}/nodes/{live['id']}", data=changes, idempotent=True))
+                result.updated.append(f"node {label} ({', '.join(changes)})")
+
+    # Links between nodes that are kept; links on removed or replaced nodes go with them
+    topo_interfaces = {intf.id: (node, intf) for node in topology.nodes for intf in node.interfaces}
+
+    def link_ends(
+        i1: str, i2: str, interfaces: dict[str, list[dict[str, Any]]], node_ids: dict[str, str]
+    ) -> tuple[str, str] | None:
+        ends = []
+        for iid in (i1, i2):
+            node, intf = topo_interfaces[iid]
+            nid = node_ids.get(str(node.label))
+            live = _resolve_interface(intf, interfaces.get(nid, [])) if nid is not None else None
+            if live is None:
+                return None
+            ends.append(live["id"])
+        return ends[0], ends[1]
+
+    wanted_links = {
+        frozenset(ends) for link in topology.links if (ends := link_ends(link.i1, link.i2, live_interfaces, kept)) is not None
+    }
+    kept_ids = set(kept.values())
+    for link in live_links:
+        key = frozenset((link["interface_a"], link["interface_b"]))
+        if link["node_a"] in kept_ids and link["node_b"] in kept_ids and key not in wanted_links:
+            tasks.append(client.delete(f"/labs/{lid}/links/{link['id']}"))
+            result.deleted.append(f"link {link.get('label') or link['id']}")
+
+    # Annotations, matched by the attributes the topology sets
+    wanted_annotations = [annotation.model_dump(mode="json", exclude_none=True) for annotation in topology.annotations]
+    unmatched = list(live_annotations)
+    for annotation in wanted_annotations:
+        names = set(annotation)
+        match = next((live for live in unmatched if _annotation_key(live, names) == _annotation_key(annotation, names)), None)
+        if match is not None:
+            unmatched.remove(match)
+        else:
+            tasks.append(client.post(f"/labs/{lid}/annotations", data=annotation))
+            result.created.append(f"{annotation['type']} annotation")
+    for annotation in unmatched:
+        tasks.append(client.delete(f"/labs/{lid}/annotations/{annotation['id']}"))
+        result.deleted.append(f"{annotation['type']} annotation")
+
+    await asyncio.gather(*(bounded(sem, task) for task in tasks))
+
+    # Interfaces: new nodes only have their defaults, and kept nodes may need more
+    node_ids = {label: str(nid) for label, nid in result.nodes.items()}
+    if created:
+        live_interfaces = await get_lab_interfaces(client, lid)
+    tasks = []
+    for label, node in desired_by_label.items():
+        slots = [intf.slot for intf in node.interfaces if intf.type == "physical" and intf.slot is not None]
+        have = [intf.get("slot") or 0 for intf in live_interfaces.get(node_ids[label], []) if intf.get("type") == "physical"]
+        if slots and max(slots) > max(have, default=-1):
+            # Asking for a slot creates all unallocated slots up to and including it, so this is safe to repeat
+            tasks.append(
+                client.post(f"/labs/{lid}/interfaces", data={"node": node_ids[label], "slot": max(slots)}, idempotent=True)
+            )
+            result.created.append(f"interfaces on node {label} (up to slot {max(slots)})")
+    if tasks:
+        await asyncio.gather(*(bounded(sem, task) for task in tasks))
+        live_interfaces = await get_lab_interfaces(client, lid)
+
+    # Links
+    existing = {frozenset((link["interface_a"], link["interface_b"])): link for link in live_links}
+    tasks = []
+
+    async def create_link(src: str, dst: str, conditioning: dict[str, Any]) -> None:
+        resp = await client.post(f"/labs/{lid}/links", data={"src_int": src, "dst_int": dst})
+        if conditioning:
+            await client.patch(f"/labs/{lid}/links/{resp['id']}/condition", data=conditioning, idempotent=True)
+
+    async def condition_link(link_id: str, conditioning: dict[str, Any]) -> bool:
+        current = await client.get(f"/labs/{lid}/links/{link_id}/condition")
+        if all(current.get(name) == value for name, value in conditioning.items()):
+            return False
+        await client.patch(f"/labs/{lid}/links/{link_id}/condition", data=conditioning, idempotent=True)
+        return True
+
+    conditioned: list[tuple[str, Awaitable[bool]]] = []
+    for link in topology.links:
+        ends = link_ends(link.i1, link.i2, live_interfaces, node_ids)
+        name = f"link {link.label or link.id}"
+        if ends is None:
+            raise ValueError(f"Could not find the interfaces for {name}.")
+        conditioning = _link_conditioning(link)
+        key = frozenset(ends)
+        if key not in existing:
+            tasks.append(create_link(*ends, conditioning))
+            result.created.append(name)
+        elif conditioning:
+            conditioned.append((name, condition_link(existing[key]["id"], conditioning)))
+    changed = await asyncio.gather(*(bounded(sem, task) for task in tasks), *(bounded(sem, task) for _, task in conditioned))
+    result.updated.extend(name for (name, _), was_changed in zip(conditioned, changed[len(tasks) :]) if was_changed)
+
+    logger.debug(
+        f"Applied topology to lab {lid}: {len(result.created)} created, {len(result.updated)} updated, {len(result.deleted)} deleted"
+    )
+    return result
@@ -0,0 +1,172 @@
+# Copyright (c) 2025  Cisco Systems, Inc.
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+
+import asyncio
+import logging
+from collections.abc import Awaitable
+from typing import Any, TypeVar
+
+from .cml_client import CMLClient
+from .schemas.common import UUID4Type
+from .schemas.nodes import NodeCreate
+from .types import BuiltTopology, LabelLinkCreate
+
+logger = logging.getLogger("cml-mcp")
+
+T = TypeVar("T")
+
+
+async def bounded(sem: asyncio.Semaphore, coro: Awaitable[T]) -> T:
+    async with sem:
+        return await coro
+
+
+async def get_lab_interfaces(client: CMLClient, lid: UUID4Type) -> dict[str, list[dict[str, Any]]]:
+    """
+    Fetch every interface in a lab in one request, grouped by node ID and ordered by slot.
+    """
+    by_node: dict[str, list[dict[str, Any]]] = {}
+    for intf in await client.get(f"/labs/{lid}/interfaces", params={"data": True, "operational": False}):
+        by_node.setdefault(intf["node"], []).append(intf)
+    for intfs in by_node.values():
+        intfs.sort(key=lambda intf: (intf.get("type") != "physical", intf.get("slot") or 0))
+    return by_node
+
+
+def _assign_interfaces(
+    links: list[LabelLinkCreate], node_ids: dict[str, UUID4Type], interfaces: dict[str, list[dict[str, Any]]]
+) -> tuple[list[tuple[str | None, str | None]], dict[str, int]]:
+    """
+    Pick an interface for each end of each link.
+
+    Named interfaces are looked up by label and reserved first, so that unnamed ends,
+    which take the next free physical interface on the node, never take one a later
+    link asks for by name.  Ends that cannot be satisfied yet are left as None, and the
+    number of extra physical interfaces each node needs is returned alongside.
+    """
+    used: set[str] = set()
+    shortfall: dict[str, int] = {}
+    ends = [end for link in links for end in ((str(link.node_a), link.interface_a), (str(link.node_b), link.interface_b))]
+    picked: list[str | None] = [None] * len(ends)
+
+    for link in links:
+        for label in (link.node_a, link.node_b):
+            if str(label) not in node_ids:
+                raise ValueError(f"Link {link.node_a} <-> {link.node_b} refers to unknown node {label}.")
+
+    for index, (label, intf_label) in enumerate(ends):
+        if intf_label is None:
+            continue
+        for intf in interfaces.get(str(node_ids[label]), []):
+            if intf["label"] == intf_label:
+                if intf["id"] in used or intf.get("is_connected"):
+                    raise ValueError(f"Interface {intf_label} on node {label} is already connected.")
+                used.add(intf["id"])
+                picked[index] = intf["id"]
+                break
+        else:
+            raise ValueError(f"Node {label} has no interface named {intf_label}.")
+
+    for index, (label, intf_label) in enumerate(ends):
+        if intf_label is not None:
+            continue
+        nid = str(node_ids[label])
+        for intf in interfaces.get(nid, []):
+            if intf.get("type") == "physical" and not intf.get("is_connected") and intf["id"] not in used:
+                used.add(intf["id"])
+                picked[index] = intf["id"]
+                break
+        else:
+            shortfall[nid] = shortfall.get(nid, 0) + 1
+
+    return list(zip(picked[0::2], picked[1::2])), shortfall
+
+
+async def build_topology(
+    client: CMLClient,
+    lid: UUID4Type,
+    nodes: list[NodeCreate],
+    links: list[LabelLinkCreate],
+    concurrency: int,
+) -> BuiltTopology:
+    """
+    Create many nodes and the links between them in an existing lab, in parallel.
+
+    Nodes are created concurrently (with their default interfaces), then every
+    interface in the lab is fetched in a single request and each link end is resolved
+    to an interface.  Nodes that need more physical interfaces than they were created
+    with get them in one request per node, and finally all links are created
+    concurrently.
+
+    Nothing is rolled back on failure; objects created before the error remain in the lab.
+
+    Args:
+        client (CMLClient): The CML API client.
+        lid (UUID4Type): The lab ID.
+        nodes (list[NodeCreate]): The nodes to create; labels must be unique.
+        links (list[LabelLinkCreate]): The links to create, referencing nodes by label.
+        concurrency (int): The maximum number of requests in flight at once.
+
+    Returns:
+        BuiltTopology: The new node IDs by label and the new link IDs.
+    """
+    labels = [str(node.label) for node in nodes]
+    duplicates = sorted({label for label in labels if labels.count(label) > 1})
+    if duplicates:
+        raise ValueError(f"Node labels must be unique; duplicated: {', '.join(duplicates)}.")
+    sem = asyncio.Semaphore(concurrency)
+
+    async def create_node(node: NodeCreate) -> UUID4Type:
+        resp = await client.post(
+            f"/labs/{lid}/nodes", params={"populate_interfaces": True}, data=node.model_dump(mode="json", exclude_defaults=True)
+        )
+        return UUID4Type(resp["id"])
+
+    node_ids = dict(zip(labels, await asyncio.gather(*(bounded(sem, create_node(node)) for node in nodes))))
+    logger.debug(f"Created {len(node_ids)} node(s) in lab {lid}")
+    if not links:
+        return BuiltTopology(nodes=node_ids, links=[])
+
+    interfaces = await get_lab_interfaces(client, lid)
+    assigned, shortfall = _assign_interfaces(links, node_ids, interfaces)
+    if shortfall:
+        # Asking for a slot creates all unallocated slots up to and including it, so this is safe to repeat
+        async def add_interfaces(nid: str, extra: int) -> None:
+            slots = [intf.get("slot") or 0 for intf in interfaces.get(nid, []) if intf.get("type") == "physical"]
+            last = max(slots, default=-1) + extra
+            await client.post(f"/labs/{lid}/interfaces", data={"node": nid, "slot": last}, idempotent=True)
+
+        await asyncio.gather(*(bounded(sem, add_interfaces(nid, extra)) for nid, extra in shortfall.items()))
+        interfaces = await get_lab_interfaces(client, lid)
+        assigned, shortfall = _assign_interfaces(links, node_ids, interfaces)
+        if shortfall:
+            raise ValueError(f"Could not create enough interfaces on node(s) {', '.join(shortfall)}.")
+
+    async def create_link(src: str, dst: str) -> UUID4Type:
+        resp = await client.post(f"/labs/{lid}/links", data={"src_int": src, "dst_int": dst})
+        return UUID4Type(resp["id"])
+
+    link_ids = await asyncio.gather(*(bounded(sem, create_link(src, dst)) for src, dst in assigned))
+    logger.debug(f"Created {len(link_ids)} link(s) in lab {lid}")
+    return BuiltTopology(nodes=node_ids, links=list(link_ids))
@@ -0,0 +1,255 @@
+# Copyright (c) 2025  Cisco Systems, Inc.
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR AND CONTRIBUTORS ``AS IS'' AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+
+import ipaddress
+import logging
+from pathlib import Path
+from typing import Any
+
+import yaml
+from jinja2 import StrictUndefined
+from jinja2.sandbox import ImmutableSandboxedEnvironment
+
+from .schemas.topologies import Topology
+
+logger = logging.getLogger("cml-mcp")
+
+DEFAULT_SCHEMA_VERSION = "0.2.2"
+
+# Node keys that belong to the spec rather than to the node itself
+SPEC_NODE_KEYS = {"role", "configuration"}
+
+# Specs (and so their templates) may come from remote callers, so templates are rendered
+# in a sandbox that refuses access to unsafe attributes and to mutating operations
+_templates = ImmutableSandboxedEnvironment(
+    undefined=StrictUndefined, keep_trailing_newline=True, trim_blocks=True, lstrip_blocks=True
+)
+
+
+def parse_topology_spec(text: str) -> dict[str, Any]:
+    """
+    Parse a topology spec given as YAML or JSON text.
+
+    The text is only ever parsed, never treated as a path, so this is safe to use on
+    specs from remote callers.
+
+    Args:
+        text (str): The spec.
+
+    Returns:
+        dict[str, Any]: The parsed spec.
+    """
+    spec = yaml.safe_load(text)
+    if not isinstance(spec, dict):
+        raise ValueError("A topology spec must be a mapping.")
+    return spec
+
+
+def load_topology_spec(path: str | Path) -> dict[str, Any]:
+    """
+    Read a topology spec from a local YAML or JSON file.
+
+    This is for local tools (e.g., the LaC scripts); never pass it a path that came from a remote caller.
+
+    Args:
+        path (str | Path): The spec file.
+
+    Returns:
+        dict[str, Any]: The parsed spec.
+    """
+    return parse_topology_spec(Path(path).read_text())
+
+
+def spec_node_definitions(spec: dict[str, Any]) -> set[str]:
+    """
+    Return the node definitions a topology spec uses, directly or through its roles.
+    """
+    roles = spec.get("roles") or {}
+    used = set()
+    for attrs in (spec.get("nodes") or {}).values():
+        attrs = attrs or {}
+        did = attrs.get("node_definition") or (roles.get(attrs.get("role")) or {}).get("node_definition")
+        if did is not None:
+            used.add(str(did))
+    return used
+
+
+def _link_ends(link: Any) -> tuple[str, str, dict[str, Any]]:
+    # A link is either a [node_a, node_b] pair or a mapping with a and b plus link attributes
+    if isinstance(link, (list, tuple)) and len(link) == 2:
+        return str(link[0]), str(link[1]), {}
+    if isinstance(link, dict) and "a" in link and "b" in link:
+        return str(link["a"]), str(link["b"]), {k: v for k, v in link.items() if k not in ("a", "b")}
+    raise ValueError(f"Invalid link {link!r}; expected [node_a, node_b] or a mapping with a and b.")
+
+
+def _plan_addresses(
+    name: str, plan: dict[str, Any], labels: list[str], peers: dict[str, dict[str, str | None]]
+) -> dict[str, dict[str, Any]]:
+    """
+    Assign addresses from an IP plan.
+
+    Nodes listed under static get that address; every other node linked to the via
+    node gets the next free host address, in node order, on its interface to it.
+    """
+    network = ipaddress.ip_network(plan["network"])
+    via = plan.get("via")
+    static = {str(label): ipaddress.ip_address(address) for label, address in (plan.get("static") or {}).items()}
+    hosts = (host for host in network.hosts() if int(host) - int(network.network_address) >= plan.get("start", 1))
+    taken = set(static.values())
+    assigned: dict[str, dict[str, Any]] = {}
+    for label in labels:
+        interface = peers[label].get(via)
+        if label in static:
+            address = static[label]
+        elif via in peers[label]:
+            address = next((host for host in hosts if host not in taken), None)
+            if address is None:
+                raise ValueError(f"IP plan {name} ran out of addresses in {network}.")
+        else:
+            continue
+        assigned[label] = {
+            "address": str(address),
+            "prefixlen": network.prefixlen,
+            "netmask": str(network.netmask),
+            "cidr": f"{address}/{network.prefixlen}",
+            "network": str(network),
+            "interface": interface,
+        }
+    return assigned
+
+
+def compile_topology(
+    spec: dict[str, Any], interface_labels: dict[str, list[str]] | None = None, min_counts: dict[str, int] | None = None
+) -> Topology:
+    """
+    Compile a topology spec into a Topology that can be imported or applied in one go.
+
+    A spec looks like this (YAML shown; JSON works the same):
+
+        lab: {title: My lab, description: ..., notes: ...}
+        roles:                    # attributes shared by nodes; a node's own attributes win
+          router: {node_definition: iosv, configuration: "hostname {{ label }}\\n..."}
+        snippets:                 # text made available to configuration templates
+          ssh: "ip ssh version 2\\n"
+        nodes:                    # label -> attributes, in order
+          r1: {role: router, x: 0, y: 0}
+          r2: {role: router, x: 200, y: 0}
+          sw: {node_definition: iosvl2, x: 100, y: -100}
+        links:                    # [a, b] or {a: ..., b: ..., label: ..., conditioning: {...}}
+          - [r1, r2]
+          - [r1, sw]
+        ip_plans:                 # addresses on the interface facing the via node
+          mgmt: {network: 192.168.100.0/24, via: sw, static: {sw: 192.168.100.254}}
+        annotations:
+          - {type: rectangle, x1: 0, y1: 0, x2: 100, y2: 100, color: "#7EFF7F"}
+
+    Each link takes the next free physical interface on both of its nodes, and nodes are
+    then given any more interfaces their node definition needs to start.  A node's
+    configuration is a Jinja template rendered with label, interfaces (label, slot and
+    peer of each), peers (peer label -> interface label), ip (plan -> address, netmask,
+    prefixlen, cidr, network and interface) and snippets.
+
+    Args:
+        spec (dict[str, Any]): The topology spec.
+        interface_labels (dict[str, list[str]] | None): Physical interface labels by node
+            definition, in slot order.  Interfaces on other node definitions are left unlabelled.
+        min_counts (dict[str, int] | None): The minimum number of physical interfaces by node definition.
+
+    Returns:
+        Topology: The compiled topology.
+    """
+    interface_labels = interface_labels or {}
+    min_counts = min_counts or {}
+    roles = spec.get("roles") or {}
+    spec_nodes = spec.get("nodes") or {}
+    labels = [str(label) for label in spec_nodes]
+
+    nodes: dict[str, dict[str, Any]] = {}
+    for index, (label, attrs) in enumerate(spec_nodes.items()):
+        attrs = dict(attrs or {})
+        role = attrs.get("role")
+        if role is not None and role not in roles:
+            raise ValueError(f"Node {label} has unknown role {role}.")
+        merged = {**(roles.get(role) or {}), **attrs}
+        if "node_definition" not in merged:
+            raise ValueError(f"Node {label} has no node_definition.")
+        nodes[str(label)] = {"id": f"n{index}", "label": str(label), "x": 0, "y": 0, **merged}
+
+    # Interfaces are handed out in link order, so the numbering is stable between runs
+    interfaces: dict[str, list[dict[str, Any]]] = {label: [] for label in labels}
+    peers: dict[str, dict[str, str | None]] = {label: {} for label in labels}
+    links = []
+    interface_count = 0
+
+    def add_interface(label: str, peer: str | None) -> dict[str, Any]:
+        nonlocal interface_count
+        node = nodes[label]
+        slot = len(interfaces[label])
+        names = interface_labels.get(node["node_definition"])
+        if names is not None and slot >= len(names):
+            raise ValueError(f"Node {label} needs more than the {len(names)} interfaces {node['node_definition']} has.")
+        intf = {"id": f"i{interface_count}", "node": node["id"], "type": "physical", "slot": slot, "peer": peer}
+        if names is not None:
+            intf["label"] = names[slot]
+        if peer is not None:
+            peers[label].setdefault(peer, intf.get("label"))
+        interface_count += 1
+        interfaces[label].append(intf)
+        return intf
+
+    for index, link in enumerate(spec.get("links") or []):
+        a, b, attrs = _link_ends(link)
+        for label in (a, b):
+            if label not in nodes:
+                raise ValueError(f"Link {a} <-> {b} refers to unknown node {label}.")
+        ia, ib = add_interface(a, b), add_interface(b, a)
+        links.append({"id": f"l{index}", "i1": ia["id"], "n1": ia["node"], "i2": ib["id"], "n2": ib["node"], **attrs})
+
+    for label, node in nodes.items():
+        while len(interfaces[label]) < min_counts.get(node["node_definition"], 0):
+            add_interface(label, None)
+
+    ip = {label: {} for label in labels}
+    for name, plan in (spec.get("ip_plans") or {}).items():
+        for label, assigned in _plan_addresses(name, plan, labels, peers).items():
+            ip[label][name] = assigned
+
+    snippets = spec.get("snippets") or {}
+    topo_nodes = []
+    for label, node in nodes.items():
+        template = node.get("configuration")
+        if template is not None:
+            context = {"label": label, "interfaces": interfaces[label], "peers": peers[label], "ip": ip[label], "snippets": snippets}
+            node["configuration"] = _templates.from_string(template).render(context)
+        node_intfs = [{k: v for k, v in intf.items() if k != "peer"} for intf in interfaces[label]]
+        topo_nodes.append(
+            {**{k: v for k, v in node.items() if k not in SPEC_NODE_KEYS}, "configuration": node.get("configuration"), "interfaces": node_intfs}
+        )
+
+    lab = {"version": DEFAULT_SCHEMA_VERSION, **(spec.get("lab") or {})}
+    topology = Topology(nodes=topo_nodes, links=links, lab=lab, annotations=spec.get("annotations") or [])
+    logger.debug(f"Compiled topology spec: {len(topo_nodes)} node(s), {len(links)} link(s), {interface_count} interface(s)")
+    return topology
+
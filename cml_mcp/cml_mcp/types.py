@@ -22,13 +22,14 @@
 # OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
 # SUCH DAMAGE.
 
-from typing import Literal
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
 from cml_mcp.schemas.common import DefinitionID, LinuxInterfaceName, UUID4Type
 from cml_mcp.schemas.interfaces import InterfaceLabel
-from cml_mcp.schemas.node_definitions import General
+from cml_mcp.schemas.node_definitions import General, PhysicalField
+from cml_mcp.schemas.nodes import NodeLabel
 
 
 class SimplifiedInterfaces(BaseModel, extra="ignore"):
@@ -43,6 +44,7 @@ class SimplifiedInterfaces(BaseModel, extra="ignore"):
         ge=0,
         le=4,
     )
+    physical: list[PhysicalField] = Field(default_factory=list, description="List of physical interfaces.")
     has_loopback_zero: bool = Field(..., description="Has `loopback0` interface (used with ANK).")
     min_count: int | None = Field(
         default=None,
@@ -89,3 +91,59 @@ class SimplifiedInterfaceResponse(SimplifiedInterfaceBase, extra="ignore"):
     id: UUID4Type = Field(..., description="ID of the interface.")
     label: InterfaceLabel = Field(...)
     device_name: LinuxInterfaceName | None = Field(default=None, max_length=64, description="Device name (operational).")
+
+
+class TeardownResult(BaseModel, extra="ignore"):
+    """The outcome of tearing down (stopping, wiping and deleting) a single lab or node."""
+
+    id: UUID4Type = Field(..., description="ID of the lab or node.")
+    deleted: bool = Field(..., description="Whether the lab or node was deleted.")
+    error: str | None = Field(default=None, description="Why the teardown failed, if it did.")
+
+
+class CliResult(BaseModel, extra="ignore"):
+    """The outcome of running CLI commands on a single node."""
+
+    label: str = Field(..., description="Label of the node.")
+    output: str | None = Field(default=None, description="The command output, if the commands ran.")
+    error: str | None = Field(default=None, description="Why the commands failed, if they did.")
+
+
+class NodePage(BaseModel, extra="ignore"):
+    """One page of the nodes in a lab."""
+
+    nodes: list[dict[str, Any]] = Field(..., description="The nodes on this page, with only the requested fields.")
+    total: int = Field(..., description="The number of nodes matching the filters, across all pages.")
+    next_offset: int | None = Field(default=None, description="The offset of the next page, or null if this is the last page.")
+
+
+class LabelLinkCreate(BaseModel, extra="forbid"):
+    """A link between two nodes, referenced by their labels."""
+
+    node_a: NodeLabel = Field(..., description="Label of the first node.")
+    node_b: NodeLabel = Field(..., description="Label of the second node.")
+    interface_a: InterfaceLabel | None = Field(
+        default=None, description="Interface label on the first node, or null to use the next free physical interface."
+    )
+    interface_b: InterfaceLabel | None = Field(
+        default=None, description="Interface label on the second node, or null to use the next free physical interface."
+    )
+
+
+class BuiltTopology(BaseModel, extra="ignore"):
+    """The objects created by a bulk topology build."""
+
+    nodes: dict[str, UUID4Type] = Field(..., description="Map of node label to node ID.")
+    links: list[UUID4Type] = Field(..., description="IDs of the created links, in the order they were given.")
+
+
+class AppliedTopology(BaseModel, extra="ignore"):
+    """The changes made to bring a lab in line with a desired topology."""
+
+    nodes: dict[str, UUID4Type] = Field(..., description="Map of node label to node ID, after the changes.")
+    created: list[str] = Field(default_factory=list, description="The elements that were created.")
+    updated: list[str] = Field(default_factory=list, description="The elements that were updated.")
+    deleted: list[str] = Field(default_factory=list, description="The elements that were deleted.")
+    skipped: list[str] = Field(
+        default_factory=list, description="The changes that were not made because they need the node to be wiped first."
+    )
@@ -0,0 +1,56 @@
+import inspect
+import os
+
+import httpx
+import pytest
+
+# The package reads its settings at import time; give it a controller that is never contacted
+os.environ.setdefault("VIRL_HOST", "https://cml.test")
+os.environ.setdefault("VIRL_USERNAME", "admin")
+os.environ.setdefault("VIRL_PASSWORD", "secret")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+HOST = "https://cml.test"
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers():
+    from cml_mcp import cml_client
+
+    # Breakers are shared per controller; start every test with a closed one
+    cml_client._breakers.clear()
+    yield
+    cml_client._breakers.clear()
+
+
+def _make_client(handler, **kwargs) -> tuple["CMLClient", list[httpx.Request]]:
+    """
+    Build a client whose requests go to handler, recording every API request it sends.
+    """
+    sent: list[httpx.Request] = []
+
+    async def dispatch(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/v0/authenticate":
+            return httpx.Response(200, json="token")
+        sent.append(request)
+        resp = handler(request, len(sent))
+        return await resp if inspect.isawaitable(resp) else resp
+
+    from cml_mcp.cml_client import CMLClient, RetryPolicy
+
+    client = CMLClient(HOST, "admin", "secret", retry=RetryPolicy(attempts=3, base_delay=0.0), **kwargs)
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(dispatch))
+    return client, sent
+
+
+@pytest.fixture
+def make_client():
+    """
+    Build CMLClients that talk to a handler(request, n) through httpx.MockTransport.
+    """
+    return _make_client
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+from cml_mcp.cli_pool import PyatsSessionPool
+
+
+class FakeDevice(object):
+    def __init__(self, name):
+        self.name = name
+        self.connected = False
+        self.connects = 0
+
+    def is_connected(self):
+        return self.connected
+
+    def connect(self, **kwargs):
+        self.connected = True
+        self.connects += 1
+
+    def disconnect(self):
+        self.connected = False
+
+    def execute(self, commands, **kwargs):
+        return f"{self.name}: {commands}"
+
+
+class FakePool(PyatsSessionPool):
+    def __init__(self):
+        super().__init__("admin", "secret", idle_ttl=300.0)
+        self.devices = []
+
+    def _load_testbed(self, testbed_yaml):
+        device = FakeDevice("r1")
+        self.devices.append(device)
+        return SimpleNamespace(devices={"r1": device})
+
+
+def test_sessions_are_reused():
+    pool = FakePool()
+    assert pool.run("lab", "r1", "show version", False, "fp", lambda: "") == "r1: show version"
+    assert pool.run("lab", "r1", "show clock", False, "fp", lambda: "") == "r1: show clock"
+    assert len(pool.devices) == 1
+    assert pool.devices[0].connects == 1
+
+
+def test_session_dropped_before_it_is_locked_is_not_used():
+    pool = FakePool()
+    pool.run("lab", "r1", "show version", False, "fp", lambda: "")
+    checkout = pool._checkout
+    calls = []
+
+    def racing_checkout(*args):
+        session = checkout(*args)
+        if not calls:
+            # A testbed reload drops the session after checkout, before the caller locks it
+            with pool._lock:
+                stale = pool._pop_lab("lab")
+            for dropped in stale:
+                pool._disconnect(dropped)
+        calls.append(session)
+        return session
+
+    pool._checkout = racing_checkout
+    pool.run("lab", "r1", "show clock", False, "fp", lambda: "")
+    assert len(calls) == 2 and calls[0] is not calls[1]
+    # The command ran on the session the pool now tracks, so closing the pool disconnects it
+    assert pool._sessions[("lab", "r1")] is calls[1]
+    pool.close()
+    assert not any(device.connected for device in pool.devices)
@@ -0,0 +1,113 @@
+import asyncio
+
+import httpx
+import pytest
+
+from cml_mcp import cml_client as cml_client_module
+from cml_mcp.cml_client import CircuitOpenError, RetryPolicy, retry_after
+
+
+@pytest.mark.anyio
+async def test_get_is_retried_on_503(make_client):
+    client, sent = make_client(lambda request, n: httpx.Response(503) if n == 1 else httpx.Response(200, json=[]))
+    assert await client.get("/labs") == []
+    assert len(sent) == 2
+    assert client.stats.retries == 1
+
+
+@pytest.mark.anyio
+async def test_post_is_not_retried_after_a_response(make_client):
+    client, sent = make_client(lambda request, n: httpx.Response(503))
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.post("/labs", data={})
+    assert len(sent) == 1
+
+
+@pytest.mark.anyio
+async def test_post_is_retried_when_it_was_never_sent(make_client):
+    def handler(request, n):
+        if n == 1:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, json={"id": "x"})
+
+    client, sent = make_client(handler)
+    assert await client.post("/labs", data={}) == {"id": "x"}
+    assert len(sent) == 2
+
+
+@pytest.mark.anyio
+async def test_retried_delete_that_finds_nothing_succeeds(make_client):
+    client, sent = make_client(lambda request, n: httpx.Response(502) if n == 1 else httpx.Response(404))
+    assert await client.delete("/labs/l1") is None
+    assert len(sent) == 2
+
+
+@pytest.mark.anyio
+async def test_first_delete_404_is_an_error(make_client):
+    client, _ = make_client(lambda request, n: httpx.Response(404))
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.delete("/labs/l1")
+
+
+def test_retry_after_header():
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "2"})) == 2.0
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "3600"})) == cml_client_module.RETRY_AFTER_MAX
+    assert retry_after(httpx.Response(429)) is None
+
+
+@pytest.mark.anyio
+async def test_breaker_opens_then_half_opens(monkeypatch, make_client):
+    now = [1000.0]
+    monkeypatch.setattr(cml_client_module.time, "monotonic", lambda: now[0])
+    healthy = [False]
+    client, sent = make_client(
+        lambda request, n: httpx.Response(200, json=[]) if healthy[0] else httpx.Response(500),
+        breaker_threshold=2,
+        breaker_reset=30.0,
+    )
+    client.retry = RetryPolicy(attempts=1)
+
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.get("/labs")
+    assert client.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        await client.get("/labs")
+    assert len(sent) == 2
+
+    # After the reset timeout one probe goes through; while it is in flight the circuit is half-open
+    now[0] += 30.0
+    assert client.breaker.allow()
+    assert client.breaker.state == "half-open"
+    assert not client.breaker.allow()
+
+    # A successful probe closes the circuit
+    healthy[0] = True
+    client.breaker.record_success()
+    assert client.breaker.state == "closed"
+    assert await client.get("/labs") == []
+
+
+@pytest.mark.anyio
+async def test_concurrent_gets_share_one_request_but_not_results(make_client):
+    release = asyncio.Event()
+
+    async def slow_labs(request, n):
+        await release.wait()
+        return httpx.Response(200, json=[{"id": "l1", "tags": []}])
+
+    client, sent = make_client(slow_labs)
+
+    waiters = [asyncio.create_task(client.get("/labs")) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert len(sent) == 1
+    assert client.stats.coalesced == 2
+    assert results[0] == results[1] == results[2]
+    # Each caller may modify its result without affecting the others
+    results[0][0]["tags"].append("mine")
+    assert results[1][0]["tags"] == [] and results[2][0]["tags"] == []
+    assert len({id(result) for result in results}) == 3
+
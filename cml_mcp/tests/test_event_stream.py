@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from cml_mcp.event_stream import ConvergenceWaiter, is_convergence_event
+
+LAB = "lab1"
+
+
+def lab_event(event, element_type):
+    return {"event_type": "lab_event", "event": event, "element_type": element_type, "lab_id": LAB, "element_id": "x"}
+
+
+@pytest.mark.parametrize(
+    "message, wakes",
+    [
+        (lab_event("state", "node"), True),
+        (lab_event("state", "lab"), True),
+        (lab_event("modified", "node"), False),
+        (lab_event("created", "link"), False),
+        (lab_event("state", "link"), False),
+        (lab_event("state", "unknown"), False),
+        ({"lab_id": LAB, "node_id": "n1", "event": "BOOTED", "timestamp": "2025-01-01T00:00:00"}, True),
+        ({"lab_id": LAB, "node_id": "n1", "event": "MONITOR", "timestamp": "2025-01-01T00:00:00"}, False),
+        ({"event_type": "system_event", "event": "state", "lab_id": LAB}, False),
+    ],
+)
+def test_only_state_and_boot_events_wake_waiters(message, wakes):
+    assert is_convergence_event(message) is wakes
+
+
+class FakeEvents(object):
+    connected = True
+
+    def subscribe(self, listener):
+        self.listener = listener
+
+    def unsubscribe(self, listener):
+        self.listener = None
+
+
+@pytest.mark.anyio
+async def test_waiter_rechecks_on_state_events_only():
+    events = FakeEvents()
+    waiter = ConvergenceWaiter(events)
+    checks = []
+
+    async def check():
+        checks.append(len(checks))
+        return len(checks) > 1
+
+    wait = asyncio.create_task(waiter.wait(LAB, check, timeout=10.0))
+    await asyncio.sleep(0)
+    assert checks == [0]
+    events.listener(lab_event("modified", "node"))
+    await asyncio.sleep(0)
+    assert checks == [0]
+    events.listener(lab_event("state", "node"))
+    await asyncio.wait_for(wait, 1.0)
+    assert checks == [0, 1]
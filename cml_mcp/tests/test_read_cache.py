@@ -0,0 +1,57 @@
+import asyncio
+
+import httpx
+import pytest
+
+from cml_mcp.read_cache import ReadCache
+
+
+class FakeEvents(object):
+    connected = True
+
+    def subscribe(self, listener):
+        self.listener = listener
+
+
+@pytest.mark.anyio
+async def test_reads_are_cached(make_client):
+    client, sent = make_client(lambda request, n: httpx.Response(200, json={"id": "lab1", "n": n}))
+    cache = ReadCache(client, FakeEvents(), maxsize=16)
+    assert await cache.get("/labs/lab1") == {"id": "lab1", "n": 1}
+    assert await cache.get("/labs/lab1") == {"id": "lab1", "n": 1}
+    assert len(sent) == 1
+
+
+@pytest.mark.anyio
+async def test_invalidation_during_a_read_keeps_it_out_of_the_cache(make_client):
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def handler(request, n):
+        if n == 1:
+            started.set()
+            await release.wait()
+        return httpx.Response(200, json={"n": n})
+
+    client, sent = make_client(handler)
+    cache = ReadCache(client, FakeEvents(), maxsize=16)
+    read = asyncio.create_task(cache.get("/labs/lab1/nodes"))
+    await started.wait()
+    # A write lands while the read is on the wire, so its answer may predate the write
+    cache.invalidate("/labs/lab1")
+    release.set()
+    assert await read == {"n": 1}
+    assert await cache.get("/labs/lab1/nodes") == {"n": 2}
+    assert len(sent) == 2
+    # Nothing is in flight any more, so nothing needs to remember the invalidation
+    assert not cache._invalidated
+    assert not cache._in_flight
+
+
+@pytest.mark.anyio
+async def test_invalidations_are_not_recorded_when_nothing_is_in_flight(make_client):
+    client, _ = make_client(lambda request, n: httpx.Response(200, json={}))
+    cache = ReadCache(client, FakeEvents(), maxsize=16)
+    for index in range(100):
+        cache.invalidate(f"/labs/lab{index}")
+    assert not cache._invalidated
@@ -0,0 +1,138 @@
+import json
+import re
+
+import httpx
+import pytest
+
+from cml_mcp.topology_apply import apply_topology
+from cml_mcp.topology_compiler import compile_topology
+
+LAB = "8a5c9d5e-3f4b-4c6d-9e7f-0a1b2c3d4e5f"
+LABELS = {"iosv": [f"GigabitEthernet0/{slot}" for slot in range(4)]}
+
+SPEC = {
+    "lab": {"title": "apply test"},
+    "roles": {"router": {"node_definition": "iosv", "configuration": "hostname {{ label }}\n"}},
+    "nodes": {"r1": {"role": "router", "x": 0, "y": 0}, "r2": {"role": "router", "x": 200, "y": 0}},
+    "links": [{"a": "r1", "b": "r2", "conditioning": {"enabled": True, "latency": 10}}],
+    "annotations": [{"type": "text", "x1": 0, "y1": -100, "text_content": "core"}],
+}
+
+
+class FakeController(object):
+    """
+    Just enough of a lab's API for apply_topology, kept in memory.
+    """
+
+    def __init__(self):
+        self.lab = {"id": LAB, "lab_title": "", "lab_description": "", "lab_notes": ""}
+        self.nodes: dict[str, dict] = {}
+        self.interfaces: dict[str, dict] = {}
+        self.links: dict[str, dict] = {}
+        self.annotations: dict[str, dict] = {}
+        self.conditions: dict[str, dict] = {}
+        self.writes: list[str] = []
+        self._ids = 0
+
+    def _id(self) -> str:
+        self._ids += 1
+        return f"00000000-0000-4000-8000-{self._ids:012d}"
+
+    def _add_interface(self, nid: str, slot: int) -> None:
+        iid = self._id()
+        self.interfaces[iid] = {"id": iid, "node": nid, "type": "physical", "slot": slot, "label": LABELS["iosv"][slot]}
+
+    def __call__(self, request: httpx.Request, n: int) -> httpx.Response:
+        path = request.url.path.removeprefix(f"/api/v0/labs/{LAB}")
+        body = json.loads(request.content) if request.content else None
+        if request.method != "GET":
+            self.writes.append(f"{request.method} {path}")
+        if request.method == "GET":
+            if path == "":
+                return httpx.Response(200, json=self.lab)
+            if path == "/nodes":
+                return httpx.Response(200, json=list(self.nodes.values()))
+            if path == "/interfaces":
+                return httpx.Response(200, json=list(self.interfaces.values()))
+            if path == "/links":
+                return httpx.Response(200, json=list(self.links.values()))
+            if path == "/annotations":
+                return httpx.Response(200, json=list(self.annotations.values()))
+            if m := re.fullmatch(r"/links/([^/]+)/condition", path):
+                return httpx.Response(200, json=self.conditions.get(m[1], {}))
+        if request.method == "PATCH":
+            if path == "":
+                self.lab.update({f"lab_{name}": value for name, value in body.items()})
+                return httpx.Response(200, json=LAB)
+            if m := re.fullmatch(r"/nodes/([^/]+)", path):
+                self.nodes[m[1]].update(body)
+                return httpx.Response(200, json=m[1])
+            if m := re.fullmatch(r"/links/([^/]+)/condition", path):
+                self.conditions[m[1]] = body
+                return httpx.Response(200, json=body)
+        if request.method == "POST":
+            if path == "/nodes":
+                nid = self._id()
+                self.nodes[nid] = {"id": nid, "state": "DEFINED_ON_CORE", **body}
+                self._add_interface(nid, 0)
+                return httpx.Response(200, json={"id": nid})
+            if path == "/interfaces":
+                have = [intf["slot"] for intf in self.interfaces.values() if intf["node"] == body["node"]]
+                for slot in range(max(have) + 1, body["slot"] + 1):
+                    self._add_interface(body["node"], slot)
+                return httpx.Response(200, json=[])
+            if path == "/links":
+                lid = self._id()
+                a, b = self.interfaces[body["src_int"]], self.interfaces[body["dst_int"]]
+                self.links[lid] = {
+                    "id": lid,
+                    "interface_a": a["id"],
+                    "interface_b": b["id"],
+                    "node_a": a["node"],
+                    "node_b": b["node"],
+                }
+                return httpx.Response(200, json={"id": lid})
+            if path == "/annotations":
+                aid = self._id()
+                self.annotations[aid] = {"id": aid, **body}
+                return httpx.Response(200, json={"id": aid})
+        return httpx.Response(404, json={"description": f"{request.method} {path} is not faked"})
+
+
+@pytest.fixture
+def topology():
+    return compile_topology(SPEC, interface_labels=LABELS)
+
+
+@pytest.mark.anyio
+async def test_apply_is_idempotent(make_client, topology):
+    controller = FakeController()
+    client, _ = make_client(controller)
+
+    first = await apply_topology(client, LAB, topology, concurrency=4, timeout=5.0)
+    assert sorted(first.nodes) == ["r1", "r2"]
+    assert "link l0" in first.created
+    assert len(controller.links) == 1
+    assert controller.conditions == {next(iter(controller.links)): {"enabled": True, "latency": 10}}
+
+    controller.writes.clear()
+    second = await apply_topology(client, LAB, topology, concurrency=4, timeout=5.0)
+    assert second.nodes == first.nodes
+    assert (second.created, second.updated, second.deleted, second.skipped) == ([], [], [], [])
+    assert controller.writes == []
+
+
+@pytest.mark.anyio
+async def test_boot_time_changes_to_running_nodes_are_skipped(make_client, topology):
+    controller = FakeController()
+    client, _ = make_client(controller)
+    await apply_topology(client, LAB, topology, concurrency=4, timeout=5.0)
+    for node in controller.nodes.values():
+        node["state"] = "BOOTED"
+
+    changed = SPEC | {"nodes": {**SPEC["nodes"], "r1": {"role": "router", "x": 50, "y": 0, "ram": 1024}}}
+    result = await apply_topology(client, LAB, compile_topology(changed, interface_labels=LABELS), concurrency=4, timeout=5.0)
+    assert result.updated == ["node r1 (x)"]
+    assert result.skipped == ["node r1 (ram): node is BOOTED; wipe it to change these"]
+    r1 = next(node for node in controller.nodes.values() if node["label"] == "r1")
+    assert r1["x"] == 50 and "ram" not in r1
@@ -0,0 +1,56 @@
+import pytest
+from jinja2.exceptions import SecurityError
+
+from cml_mcp.topology_compiler import compile_topology, parse_topology_spec
+
+IOSV = [f"GigabitEthernet0/{slot}" for slot in range(16)]
+
+SPEC = """
+lab: {title: test}
+roles:
+  router:
+    node_definition: iosv
+    configuration: |
+      hostname {{ label }}
+      interface {{ ip.mgmt.interface }}
+       ip address {{ ip.mgmt.address }} {{ ip.mgmt.netmask }}
+nodes:
+  r1: {role: router, x: 0, y: 0}
+  r2: {role: router, x: 100, y: 0}
+  sw: {node_definition: iosv, x: 50, y: -100}
+links:
+  - [r1, r2]
+  - [r1, sw]
+  - [r2, sw]
+ip_plans:
+  mgmt: {network: 192.168.100.0/24, via: sw, static: {sw: 192.168.100.254}}
+"""
+
+
+def test_compile_allocates_interfaces_and_renders_templates():
+    topology = compile_topology(parse_topology_spec(SPEC), {"iosv": IOSV}, {"iosv": 1})
+    nodes = {node.label: node for node in topology.nodes}
+    assert [intf.slot for intf in nodes["r1"].interfaces] == [0, 1]
+    assert len(topology.links) == 3
+    assert "interface GigabitEthernet0/1\n ip address 192.168.100.1 255.255.255.0" in nodes["r1"].configuration
+    assert "ip address 192.168.100.2 " in nodes["r2"].configuration
+
+
+def test_min_count_pads_unlinked_nodes():
+    spec = {"nodes": {"r1": {"node_definition": "iosv"}}}
+    topology = compile_topology(spec, {"iosv": IOSV}, {"iosv": 2})
+    assert [intf.slot for intf in topology.nodes[0].interfaces] == [0, 1]
+
+
+def test_templates_are_sandboxed():
+    payload = "{{ cycler.__init__.__globals__.os.popen('id').read() }}"
+    spec = {"nodes": {"r1": {"node_definition": "iosv", "configuration": payload}}}
+    with pytest.raises(SecurityError):
+        compile_topology(spec)
+
+
+def test_spec_text_is_never_read_as_a_path(tmp_path):
+    secret = tmp_path / "secret.yaml"
+    secret.write_text("nodes: {leaked: {node_definition: iosv}}\n")
+    with pytest.raises(ValueError):
+        parse_topology_spec(str(secret))